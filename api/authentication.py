@@ -0,0 +1,179 @@
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from time import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+User = get_user_model()
+
+# Claims embedded in every token so that requests can be authenticated without a user lookup.
+USER_CLAIMS = ["email", "is_active", "is_staff"]
+
+REVOKED_CACHE_KEY = "auth:revoked:{}"
+
+
+def add_user_claims(token, user):
+    """
+    Embed the user fields listed in `USER_CLAIMS` into the given token.
+    """
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def revoke_tokens(user_id):
+    """
+    Reject every access and refresh token issued to the user up to now. The entry
+    only has to outlive the tokens themselves, after which it expires from the cache.
+    Only with `STATELESS_AUTHENTICATION`: otherwise every request loads the user,
+    and tokens stay valid across claim and password changes.
+    """
+    if not settings.STATELESS_AUTHENTICATION:
+        return
+    cache.set(
+        REVOKED_CACHE_KEY.format(user_id),
+        int(time()),
+        timeout=int(max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME).total_seconds()),
+    )
+
+
+def uses_token_claims(token):
+    """
+    Whether the user can be taken from the token's claims rather than loaded.
+    """
+    return settings.STATELESS_AUTHENTICATION and all(claim in token for claim in USER_CLAIMS)
+
+
+def get_revocation_time(user_id):
+    """
+    When the user's tokens were last revoked, see `revoke_tokens`. Only looked up
+    with `STATELESS_AUTHENTICATION`, which is what revokes them.
+    """
+    if not settings.STATELESS_AUTHENTICATION:
+        return None
+    return cache.get(REVOKED_CACHE_KEY.format(user_id))
+
+
+async def aget_revocation_time(user_id):
+    if not settings.STATELESS_AUTHENTICATION:
+        return None
+    return await cache.aget(REVOKED_CACHE_KEY.format(user_id))
+
+
+def check_revocation(validated_token, revoked_at):
+    if revoked_at is not None and validated_token.get("iat", 0) < revoked_at:
+        raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+
+
+class VerifiedTokenCache:
+    """
+    In-process LRU cache of tokens whose signature and claims were already verified,
+    keyed by a hash of the encoded token. Entries are dropped once the token
+    expires, so a cached token is never accepted for longer than it is valid.
+    """
+
+    def __init__(self):
+        self.tokens = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_verify(self, kind, raw_token, verify):
+        """
+        The token verified by `verify(raw_token)`, from the cache when possible. `kind`
+        tells apart tokens verified against different token classes.
+        """
+        max_size = settings.VERIFIED_TOKEN_CACHE_SIZE
+        if not max_size:
+            return verify(raw_token)
+        key = (kind, sha256(raw_token.encode() if isinstance(raw_token, str) else raw_token).digest())
+        with self.lock:
+            entry = self.tokens.get(key)
+            if entry is not None:
+                token, expires_at = entry
+                if expires_at > time():
+                    self.tokens.move_to_end(key)
+                    return token
+                del self.tokens[key]
+
+        token = verify(raw_token)
+        with self.lock:
+            self.tokens[key] = (token, token.get("exp", 0))
+            while len(self.tokens) > max_size:
+                self.tokens.popitem(last=False)
+        return token
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+
+
+VERIFIED_TOKENS = VerifiedTokenCache()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    With `STATELESS_AUTHENTICATION`, authenticates requests from the claims of the
+    verified access token instead of loading the user row. The returned user is a
+    `User` instance whose remaining fields are deferred, so they are only fetched if
+    a view actually reads them. Otherwise, and for tokens issued before the claims
+    were embedded, the user is loaded from the database.
+    Verified tokens are cached in `VERIFIED_TOKENS`, revocation is still checked on
+    every request with `STATELESS_AUTHENTICATION`.
+    """
+
+    def get_validated_token(self, raw_token):
+        return VERIFIED_TOKENS.get_or_verify("auth", raw_token, super().get_validated_token)
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        check_revocation(validated_token, get_revocation_time(user_id))
+        if not uses_token_claims(validated_token):
+            return super().get_user(validated_token)
+        return self.get_token_user(validated_token, user_id)
+
+    async def aauthenticate(self, request):
+        """
+        Async variant of `authenticate`, used by the async views. The database query,
+        when one is needed, runs in a thread.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user_id = self.get_user_id(validated_token)
+        check_revocation(validated_token, await aget_revocation_time(user_id))
+        if not uses_token_claims(validated_token):
+            return await sync_to_async(super().get_user)(validated_token), validated_token
+        return self.get_token_user(validated_token, user_id), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+    def get_token_user(self, validated_token, user_id):
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        claims = {
+            api_settings.USER_ID_FIELD: user_id,
+            **{claim: validated_token[claim] for claim in USER_CLAIMS},
+        }
+        fields = [field for field in User._meta.concrete_fields if field.attname in claims]
+        return User.from_db(
+            router.db_for_read(User),
+            [field.attname for field in fields],
+            [field.to_python(claims[field.attname]) for field in fields],
+        )
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Cache backends whose entries are only seen by the process that wrote them
+PER_PROCESS_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+# Cache backends whose entries are lost when the server restarts
+VOLATILE_CACHES = {
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+}
+
+
+@register(Tags.security)
+def check_stateless_authentication(app_configs, **kwargs):
+    """
+    With `STATELESS_AUTHENTICATION`, token revocations are the only thing keeping
+    deactivated, demoted and deleted users out, so they must reach every process.
+    """
+    if not settings.STATELESS_AUTHENTICATION:
+        return []
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend in PER_PROCESS_CACHES:
+        return [Error(
+            "STATELESS_AUTHENTICATION requires a cache shared by every process.",
+            hint=f"{backend} keeps token revocations in a single process. Configure a shared "
+                 "CACHE_BACKEND or unset STATELESS_AUTHENTICATION.",
+            id="api.E001",
+        )]
+    if backend in VOLATILE_CACHES:
+        return [Warning(
+            "STATELESS_AUTHENTICATION relies on a cache that does not survive restarts.",
+            hint=f"Token revocations kept by {backend} are lost when it restarts, after which "
+                 "revoked tokens are accepted again until they expire.",
+            id="api.W001",
+        )]
+    return []
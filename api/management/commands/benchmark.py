@@ -0,0 +1,224 @@
+import json
+import statistics
+from contextlib import contextmanager, nullcontext
+from itertools import cycle
+from time import perf_counter
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+)
+from django.urls import reverse
+
+from tasks.models import Task, TaskStatus
+
+User = get_user_model()
+
+PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with N users x M tasks and measure latency, serial "
+        "request rate and queries per request of the main API endpoints. Requests are sent one "
+        "at a time, so `serial_rps` is the inverse of the mean latency, not a concurrent throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Number of users to seed")
+        parser.add_argument("--tasks", type=int, default=200, help="Number of tasks per user")
+        parser.add_argument("--requests", type=int, default=200, help="Number of requests per scenario")
+        parser.add_argument("--scenario", action="append", help="Only run the given scenario(s)")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+        parser.add_argument(
+            "--hasher", choices=list(settings.PASSWORD_HASHER_CLASSES),
+            help="Password hasher to seed and log in with, instead of the configured one"
+        )
+        parser.add_argument(
+            "--connections", choices=settings.DATABASE_CONNECTION_MODES,
+            help="Reuse connections like this DATABASE_CONNECTION_MODE and close them after each "
+                 "request like a real server does, unlike the test client"
+        )
+
+    def handle(self, *args, **options):
+        if options["connections"] == "pool" and connection.vendor != "postgresql":
+            raise CommandError("Connection pooling requires PostgreSQL")
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with self.password_hasher(options["hasher"]):
+                self.seed(options["users"], options["tasks"], options["requests"])
+                with self.connection_mode(options["connections"]):
+                    results = self.run_scenarios(options["requests"], options["scenario"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_table(results)
+
+    def password_hasher(self, name):
+        if name is None:
+            return nullcontext()
+        preferred = settings.PASSWORD_HASHER_CLASSES[name]
+        return override_settings(
+            PASSWORD_HASHERS=[preferred] + [hasher for hasher in settings.PASSWORD_HASHERS if hasher != preferred]
+        )
+
+    @contextmanager
+    def connection_mode(self, mode):
+        """
+        Apply a `DATABASE_CONNECTION_MODE` to the benchmark database, and have
+        `run_scenarios` go through the connection handling of the request_started
+        and request_finished signals, which the test client skips.
+        """
+        if mode is None:
+            self.request_boundary = lambda: None
+            yield
+            return
+        settings_dict = connection.settings_dict
+        saved = settings_dict["CONN_MAX_AGE"], settings_dict["CONN_HEALTH_CHECKS"], settings_dict["OPTIONS"]
+        connection.close()
+        settings_dict["CONN_MAX_AGE"] = settings.DATABASE_CONN_MAX_AGE if mode == "persistent" else 0
+        settings_dict["CONN_HEALTH_CHECKS"] = True
+        settings_dict["OPTIONS"] = {key: value for key, value in saved[2].items() if key != "pool"}
+        if mode == "pool":
+            settings_dict["OPTIONS"]["pool"] = {
+                "min_size": settings.DATABASE_POOL_MIN_SIZE,
+                "max_size": settings.DATABASE_POOL_MAX_SIZE,
+                "max_lifetime": settings.DATABASE_CONN_MAX_AGE,
+                "timeout": settings.DATABASE_POOL_TIMEOUT,
+            }
+        self.request_boundary = close_old_connections
+        try:
+            yield
+        finally:
+            connection.close()
+            if mode == "pool":
+                connection.close_pool()
+            settings_dict["CONN_MAX_AGE"], settings_dict["CONN_HEALTH_CHECKS"], settings_dict["OPTIONS"] = saved
+
+    def seed(self, user_count, task_count, todo_count):
+        """
+        Seed the users and their tasks. The first user, whom requests are sent as,
+        gets at least `todo_count` tasks to do, so that every request of the
+        transition scenario moves a different task.
+        """
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            User(email=f"user{i}@example.com", first_name="Bench", last_name=str(i), password=password,
+                 is_staff=i == 0)
+            for i in range(user_count)
+        )
+        statuses = list(TaskStatus)
+        for user in users:
+            Task.objects.bulk_create(
+                (
+                    Task(user=user, detail=f"Task {i}", priority=i % 5 + 1, status=statuses[i % len(statuses)])
+                    for i in range(task_count)
+                ),
+                batch_size=1000,
+            )
+        self.user = users[0]
+        missing = todo_count - self.user.tasks.filter(status=TaskStatus.TODO).count()
+        Task.objects.bulk_create(
+            (Task(user=self.user, detail=f"Todo {i}", priority=i % 5 + 1) for i in range(missing)), batch_size=1000
+        )
+
+    def get_scenarios(self):
+        client = Client()
+        response = client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": PASSWORD},
+            content_type="application/json",
+        )
+        client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {response.json()['access']}"
+        refresh = response.json()["refresh"]
+        async_client = AsyncClient()
+        async_get = async_to_sync(async_client.get)
+        headers = {"Authorization": client.defaults["HTTP_AUTHORIZATION"]}
+
+        statuses = cycle(s.value for s in TaskStatus)
+        tasks = cycle(self.user.tasks.values_list("id", flat=True))
+        todo = iter(self.user.tasks.filter(status=TaskStatus.TODO).values_list("id", flat=True))
+        return {
+            "token-obtain": lambda: Client().post(
+                reverse("token-obtain"), {"email": self.user.email, "password": PASSWORD},
+                content_type="application/json",
+            ),
+            "async-token-obtain": lambda: async_to_sync(AsyncClient().post)(
+                reverse("async-token-obtain"), {"email": self.user.email, "password": PASSWORD},
+                content_type="application/json",
+            ),
+            "token-refresh": lambda: Client().post(
+                reverse("token-refresh"), {"refresh": refresh}, content_type="application/json"
+            ),
+            "task-list": lambda: client.get(reverse("task-list"), {"status": next(statuses)}),
+            "task-detail": lambda: client.get(reverse("task-detail", args=[next(tasks)])),
+            "task-transition": lambda: client.patch(reverse("task-detail", args=[next(todo)])),
+            "task-board": lambda: client.get(reverse("task-board")),
+            "task-summary": lambda: client.get(reverse("task-summary")),
+            "user-list": lambda: client.get(reverse("user-list")),
+            "async-task-list": lambda: async_get(
+                reverse("async-task-list"), {"status": next(statuses)}, headers=headers
+            ),
+            "async-task-detail": lambda: async_get(reverse("async-task-detail", args=[next(tasks)]), headers=headers),
+            "async-task-board": lambda: async_get(reverse("async-task-board"), headers=headers),
+            "async-task-summary": lambda: async_get(reverse("async-task-summary"), headers=headers),
+        }
+
+    def run_scenarios(self, request_count, only=None):
+        results = {}
+        for name, send in self.get_scenarios().items():
+            if only and name not in only:
+                continue
+            timings, queries, connects = [], [], []
+
+            def count_connect(**kwargs):
+                connects[-1] += 1
+
+            connection_created.connect(count_connect)
+            try:
+                for _ in range(request_count):
+                    connects.append(0)
+                    # started before capturing the queries, which connects if needed
+                    start = perf_counter()
+                    with CaptureQueriesContext(connection) as context:
+                        response = send()
+                        self.request_boundary()
+                    timings.append(perf_counter() - start)
+                    if response.status_code >= 400:
+                        raise RuntimeError(f"{name} failed with {response.status_code}: {response.content[:200]}")
+                    queries.append(len(context.captured_queries))
+            finally:
+                connection_created.disconnect(count_connect)
+            results[name] = self.summarize(timings, queries, connects)
+        return results
+
+    def summarize(self, timings, queries, connects):
+        cuts = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+        return {
+            "requests": len(timings),
+            "p50_ms": round(cuts[49] * 1000, 2),
+            "p95_ms": round(cuts[94] * 1000, 2),
+            "p99_ms": round(cuts[98] * 1000, 2),
+            "serial_rps": round(len(timings) / sum(timings), 1),
+            "queries_per_request": round(statistics.mean(queries), 2),
+            "connects_per_request": round(statistics.mean(connects), 2),
+        }
+
+    def print_table(self, results):
+        columns = [
+            "requests", "p50_ms", "p95_ms", "p99_ms", "serial_rps", "queries_per_request", "connects_per_request"
+        ]
+        self.stdout.write(f"{'scenario':<20}" + "".join(f"{column:>{len(column) + 2}}" for column in columns))
+        for name, result in results.items():
+            self.stdout.write(f"{name:<20}" + "".join(f"{result[column]:>{len(column) + 2}}" for column in columns))
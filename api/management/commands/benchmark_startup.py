@@ -0,0 +1,94 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: imports the WSGI application, then serves it one request.
+# Module counts are reported too, being far less noisy than timings.
+WSGI_SCRIPT = """
+import json, sys
+from time import perf_counter
+
+start = perf_counter()
+import core.wsgi
+imported = perf_counter()
+
+from django.conf import settings
+host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+path, _, query = sys.argv[1].partition("?")
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query, "SERVER_NAME": host,
+    "SERVER_PORT": "80", "HTTP_HOST": host, "wsgi.url_scheme": "http", "wsgi.input": sys.stdin.buffer,
+    "wsgi.errors": sys.stderr,
+}
+statuses = []
+response = core.wsgi.application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b"".join(response)
+response.close()
+served = perf_counter()
+print(json.dumps({
+    "import": imported - start, "first_request": served - imported, "status": statuses[0], "modules": len(sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cold start of fresh processes under each SETTINGS_PROFILE: the wall time "
+        "of `manage.py check`, and the import time and first request latency of `core.wsgi`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=10, help="Number of processes started per measurement")
+        parser.add_argument(
+            "--path", default="/api/tasks/?status=todo",
+            help="Path of the first request, unauthenticated so that no database is needed"
+        )
+        parser.add_argument(
+            "--profile", action="append", choices=settings.SETTINGS_PROFILES, help="Only measure the given profile(s)"
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in options["profile"] or settings.SETTINGS_PROFILES:
+            env = {**os.environ, "SETTINGS_PROFILE": profile, "PYTHONDONTWRITEBYTECODE": "1"}
+            check, imports, first_requests = [], [], []
+            for _ in range(options["runs"]):
+                check.append(self.time_process([sys.executable, "manage.py", "check"], env))
+                wsgi = json.loads(self.run([sys.executable, "-c", WSGI_SCRIPT, options["path"]], env))
+                imports.append(wsgi["import"])
+                first_requests.append(wsgi["first_request"])
+            results[profile] = {
+                "manage_check_ms": round(statistics.median(check) * 1000, 1),
+                "wsgi_import_ms": round(statistics.median(imports) * 1000, 1),
+                "wsgi_first_request_ms": round(statistics.median(first_requests) * 1000, 1),
+                "modules_after_request": wsgi["modules"],
+                "first_request_status": wsgi["status"],
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        columns = [
+            "manage_check_ms", "wsgi_import_ms", "wsgi_first_request_ms", "modules_after_request", "first_request_status"
+        ]
+        self.stdout.write(f"{'profile':<10}" + "".join(f"{column:>{len(column) + 2}}" for column in columns))
+        for profile, result in results.items():
+            self.stdout.write(f"{profile:<10}" + "".join(f"{result[column]:>{len(column) + 2}}" for column in columns))
+
+    def time_process(self, command, env):
+        start = perf_counter()
+        self.run(command, env)
+        return perf_counter() - start
+
+    def run(self, command, env):
+        process = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(f"{' '.join(command[:2])} failed:\n{process.stderr}")
+        return process.stdout
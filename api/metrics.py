@@ -0,0 +1,63 @@
+import threading
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Minimal thread-safe in-process histogram, exposed in the Prometheus text format.
+    """
+
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            sample = self.samples.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    sample["buckets"][i] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            samples = [(key, {**sample, "buckets": list(sample["buckets"])}) for key, sample in self.samples.items()]
+        for key, sample in sorted(samples):
+            labels = ",".join(f'{name}="{escape(value)}"' for name, value in key)
+            bucket_labels = f"{labels}," if labels else ""
+            for bound, count in zip(self.buckets, sample["buckets"]):
+                lines.append(f'{self.name}_bucket{{{bucket_labels}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{bucket_labels}le="+Inf"}} {sample["count"]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {sample['sum']}")
+            lines.append(f"{self.name}_count{{{labels}}} {sample['count']}")
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram("api_request_duration_seconds", "Total time spent handling the request.")
+REQUEST_DB_DURATION = Histogram("api_request_db_seconds", "Time spent executing SQL queries during the request.")
+REQUEST_QUERIES = Histogram("api_request_queries", "Number of SQL queries executed by the request.", QUERY_BUCKETS)
+RESPONSE_RENDER_DURATION = Histogram(
+    "api_response_render_seconds", "Time spent rendering (serializing) the response body."
+)
+
+METRICS = [REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_QUERIES, RESPONSE_RENDER_DURATION]
+
+
+def render_metrics():
+    return "\n".join(line for metric in METRICS for line in metric.expose()) + "\n"
@@ -0,0 +1,177 @@
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from api.metrics import REQUEST_DB_DURATION, REQUEST_DURATION, REQUEST_QUERIES, RESPONSE_RENDER_DURATION
+from api.routers import astick_to_primary, get_request_user, replica_request, stick_to_primary
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting and timing the queries of a single request.
+    Only the first `max_statements` statements are kept for the slow-request log.
+    """
+
+    max_statements = 100
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.count += 1
+            self.duration += duration
+            if len(self.statements) < self.max_statements:
+                self.statements.append((duration, sql))
+
+
+# Recorder of the request being served. Unlike an execute wrapper installed around the
+# request, which only sees the connections of the installing thread, a context variable
+# follows the request into the threads that `sync_to_async` runs the ORM in.
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    Wrap the queries of every connection, in whichever thread opens it, with `record_query`.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count, database time and render time of every request,
+    labelled by the resolved URL name, and logs the SQL of slow requests.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_request_threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        request._metrics_render_duration = None
+        start = perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.observe(request, recorder, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        request._metrics_render_duration = None
+        start = perf_counter()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.observe(request, recorder, perf_counter() - start)
+        return response
+
+    def observe(self, request, recorder, duration):
+        match = getattr(request, "resolver_match", None)
+        labels = {"endpoint": match.url_name if match and match.url_name else "<unresolved>", "method": request.method}
+        REQUEST_DURATION.observe(duration, **labels)
+        REQUEST_DB_DURATION.observe(recorder.duration, **labels)
+        REQUEST_QUERIES.observe(recorder.count, **labels)
+        if request._metrics_render_duration is not None:
+            RESPONSE_RENDER_DURATION.observe(request._metrics_render_duration, **labels)
+
+        if duration >= self.slow_request_threshold:
+            slowest = sorted(recorder.statements, key=lambda statement: statement[0], reverse=True)[:5]
+            logger.warning(
+                "Slow request %s %s (%s) took %.0fms with %d queries in %.0fms. Slowest queries:\n%s",
+                request.method, request.path, labels["endpoint"], duration * 1000, recorder.count,
+                recorder.duration * 1000, "\n".join(f"[{time * 1000:.1f}ms] {sql}" for time, sql in slowest),
+            )
+
+    def process_template_response(self, request, response):
+        start = perf_counter()
+
+        def record_render_duration(rendered):
+            request._metrics_render_duration = perf_counter() - start
+
+        response.add_post_render_callback(record_render_duration)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets `api.routers.ReplicaRouter` send the reads of safe-method requests to a
+    replica, and keeps the reads of users who just wrote on the primary.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = replica_request.set(request if request.method in self.safe_methods else None)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_request.reset(token)
+        if (user_id := self.get_writer(request)) is not None:
+            stick_to_primary(user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = replica_request.set(request if request.method in self.safe_methods else None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_request.reset(token)
+        if (user_id := self.get_writer(request)) is not None:
+            await astick_to_primary(user_id)
+        return response
+
+    def get_writer(self, request):
+        """
+        Id of the authenticated user of a write request, `None` otherwise.
+        """
+        if request.method in self.safe_methods or not settings.DATABASE_REPLICAS:
+            return None
+        user = get_request_user(request)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
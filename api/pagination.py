@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("cursor") pagination over model instances or `.values()` rows. Each page
+    is a single range scan starting right after the last row of the previous page,
+    so it costs the same no matter how deep the client has paged, unlike offset
+    pagination. `ordering` must end with a unique field and be backed by an index.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 200
+    ordering = ()
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Slice of the queryset starting right after the cursor position. One extra row
+        is fetched to tell whether there is a next page.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.current_page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+        return queryset[:self.current_page_size + 1]
+
+    def get_position_filter(self, position):
+        """
+        Rows sorting after `position`, e.g. `a >= x AND (a > x OR (a = x AND b > y))`
+        for an ordering on `a`, `b`. The leading bound is redundant, but unlike the
+        disjunction it gives the planner a range to start the index scan at.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            preceding = {name.lstrip("-"): value for name, value in zip(self.ordering[:i], position)}
+            lookup = f"{field.lstrip('-')}__{'lt' if field.startswith('-') else 'gt'}"
+            condition |= Q(**preceding, **{lookup: position[i]})
+        first = self.ordering[0]
+        return Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]}) & condition
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.current_page_size
+        self.page = results[:self.current_page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(last))
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def encode_cursor(self, row):
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            values = [row[name] for name in names]
+        else:
+            values = [getattr(row, name) for name in names]
+        position = [encode_value(value) for value in values]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError, binascii.Error):
+            raise ParseError(self.invalid_cursor_message)
+        if None in position:
+            raise ParseError(self.invalid_cursor_message)
+        return position
+
+
+def encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, int):
+        return value
+    return str(value)
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework.permissions import BasePermission
 
 
@@ -14,7 +16,7 @@ class IsOwner(BasePermission):
     For objects that are owned by a user. For example, a task instance.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.user.id == request.user.id
+        return obj.user_id == request.user.id
 
 
 class IsSelfOrStaff(BasePermission):
@@ -26,3 +28,15 @@ class IsSelfOrStaff(BasePermission):
         if obj.id == request.user.id:
             return True
         return request.user.is_staff
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Grants metric scrapers access with the `METRICS_TOKEN` bearer token. The metrics
+    endpoint stays closed while no token is configured.
+    """
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        if not token:
+            return False
+        return constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}")
@@ -0,0 +1,77 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import LazyObject
+
+# Safe-method request being served, whose reads may go to a replica. Set by
+# `ReplicaRoutingMiddleware`, unset for writes and outside of requests.
+replica_request = ContextVar("replica_request", default=None)
+
+PRIMARY_STICKY_KEY = "db-primary:{}"
+
+
+def stick_to_primary(user_id):
+    """
+    Serve the user's reads from the primary for `DATABASE_REPLICA_STICKY_SECONDS`,
+    long enough for the replicas to catch up with what they just wrote. With more
+    than one process, this needs a shared cache backend.
+    """
+    cache.set(PRIMARY_STICKY_KEY.format(user_id), True, timeout=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+async def astick_to_primary(user_id):
+    await cache.aset(PRIMARY_STICKY_KEY.format(user_id), True, timeout=settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def get_request_user(request):
+    """
+    The authenticated user once DRF has set it on the request, `None` before. The
+    lazy session user is never evaluated, as loading it would itself be routed.
+    """
+    user = request.__dict__.get("user")
+    if user is None or isinstance(user, LazyObject):
+        return None
+    return user
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of safe-method requests to one of `DATABASE_REPLICAS`, chosen
+    once per request, and everything else to the primary: writes, reads of unsafe
+    requests, reads inside a transaction, reads before the user is known and reads
+    of a user who wrote in the last `DATABASE_REPLICA_STICKY_SECONDS`.
+    """
+
+    def db_for_read(self, model, **hints):
+        request = replica_request.get()
+        if request is None or not settings.DATABASE_REPLICAS or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        alias = getattr(request, "_read_database", None)
+        if alias is None:
+            user = get_request_user(request)
+            if user is None:
+                return DEFAULT_DB_ALIAS
+            if user.is_authenticated and cache.get(PRIMARY_STICKY_KEY.format(user.pk)):
+                alias = DEFAULT_DB_ALIAS
+            else:
+                alias = random.choice(settings.DATABASE_REPLICAS)
+            request._read_database = alias
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas receive the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
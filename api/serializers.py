@@ -1,7 +1,21 @@
-from django.contrib.auth import authenticate
+from copy import copy
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer, TokenRefreshSerializer, TokenVerifySerializer
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from api.authentication import (
+    VERIFIED_TOKENS, add_user_claims, check_revocation, get_revocation_time, uses_token_claims
+)
+
+User = get_user_model()
 
 
 class EnumField(serializers.Field):
@@ -27,7 +41,37 @@ class EnumField(serializers.Field):
         }
 
 
+def isoformat(value, timezone):
+    """
+    Format a datetime the way DRF's `DateTimeField` does, in the given timezone.
+    """
+    value = value.astimezone(timezone).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class RowSerializer:
+    """
+    Base for read-only fast-path serializers that turn `.values()` rows into the
+    exact output of a `ModelSerializer`, without going through DRF's per-field
+    machinery for every row.
+    """
+    fields = []
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
@@ -38,8 +82,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         user = authenticate(email=email, password=password)
         if user is None:
             raise serializers.ValidationError(detail="Invalid email address or password.")
+        return self.get_token_data(user)
 
-        refresh = RefreshToken.for_user(user)
+    @classmethod
+    def get_token_data(cls, user):
+        refresh = cls.get_token(user)
         return {
             "refresh": str(refresh),
             "access": str(refresh.access_token),
@@ -49,4 +96,42 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             "last_name": user.last_name,
             "is_active": user.is_active,
             "is_staff": user.is_staff,
-        }
\ No newline at end of file
+        }
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    With `STATELESS_AUTHENTICATION`, issues access tokens from the user claims
+    embedded in the refresh token, without looking the user up. Refresh tokens
+    issued before the user's claims or password changed are rejected through the
+    revocation list, so the claims are never stale. Otherwise, and for refresh
+    tokens issued before the claims were embedded, the user is loaded and checked.
+    """
+    def validate(self, attrs):
+        refresh = copy(VERIFIED_TOKENS.get_or_verify(self.token_class, attrs["refresh"], self.token_class))
+        # A cached token keeps the time it was first verified at, which the access
+        # token expiry is computed from
+        refresh.current_time = aware_utcnow()
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        check_revocation(refresh, get_revocation_time(user_id))
+
+        if uses_token_claims(refresh):
+            if api_settings.CHECK_USER_IS_ACTIVE and not refresh["is_active"]:
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+            return {"access": str(refresh.access_token)}
+
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        return {"access": str(add_user_claims(refresh.access_token, user))}
+
+
+class CustomTokenVerifySerializer(TokenVerifySerializer):
+    """
+    Skips signature verification for tokens found in `VERIFIED_TOKENS`.
+    """
+    def validate(self, attrs):
+        if "rest_framework_simplejwt.token_blacklist" in settings.INSTALLED_APPS:
+            return super().validate(attrs)
+        VERIFIED_TOKENS.get_or_verify(UntypedToken, attrs["token"], UntypedToken)
+        return {}
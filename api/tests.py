@@ -1,3 +1,126 @@
-from django.test import TestCase
+from time import sleep
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import router, transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import VERIFIED_TOKENS
+from api.checks import check_stateless_authentication
+from api.metrics import REQUEST_QUERIES
+from api.middleware import ReplicaRoutingMiddleware
+from tasks.models import Task
+from users.models import User
+
+
+class TokenRefreshTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        response = self.client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, content_type="application/json"
+        )
+        self.refresh = response.json()["refresh"]
+
+    def refresh_token(self):
+        return self.client.post(reverse("token-refresh"), {"refresh": self.refresh}, content_type="application/json")
+
+    @override_settings(STATELESS_AUTHENTICATION=True)
+    def test_refresh_uses_embedded_claims(self):
+        with self.assertNumQueries(0):
+            response = self.refresh_token()
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.json()["access"])
+        self.assertEqual((access["email"], access["is_staff"]), (self.user.email, False))
+
+    def test_refresh_checks_user_without_stateless_authentication(self):
+        # an update that sends no signal, like a revocation lost by a per-process cache
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertEqual(self.refresh_token().status_code, 401)
+
+    @override_settings(STATELESS_AUTHENTICATION=True)
+    def test_refresh_rejected_after_password_change(self):
+        # revocation has a one second resolution
+        sleep(1)
+        self.user.set_password("new password")
+        self.user.save(update_fields=["password"])
+        self.assertEqual(self.refresh_token().status_code, 401)
+
+    def test_verified_tokens_are_cached(self):
+        VERIFIED_TOKENS.clear()
+        access = self.refresh_token().json()["access"]
+        headers = {"Authorization": f"Bearer {access}"}
+        self.assertEqual(self.client.get(reverse("task-summary"), headers=headers).status_code, 200)
+        cached = dict(VERIFIED_TOKENS.tokens)
+        self.assertEqual(self.client.get(reverse("task-summary"), headers=headers).status_code, 200)
+        self.assertEqual(dict(VERIFIED_TOKENS.tokens), cached)
+        self.assertEqual(len(cached), 2)
+
+
+class StatelessAuthenticationCheckTests(SimpleTestCase):
+    @override_settings(STATELESS_AUTHENTICATION=True)
+    def test_requires_shared_cache(self):
+        self.assertEqual([error.id for error in check_stateless_authentication(None)], ["api.E001"])
+        backend = "django.core.cache.backends.redis.RedisCache"
+        with override_settings(CACHES={"default": {"BACKEND": backend}}):
+            self.assertEqual(check_stateless_authentication(None), [])
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.task = Task.objects.create(user=self.user, detail="task", priority=1)
+        response = self.client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, content_type="application/json"
+        )
+        self.headers = {"Authorization": f"Bearer {response.json()['access']}"}
+        REQUEST_QUERIES.clear()
+
+    def recorded_queries(self, endpoint):
+        return REQUEST_QUERIES.samples[(("endpoint", endpoint), ("method", "GET"))]["sum"]
+
+    def test_counts_queries(self):
+        self.client.get(reverse("task-detail", args=[self.task.id]), headers=self.headers)
+        # the user and the task
+        self.assertEqual(self.recorded_queries("task-detail"), 2)
+
+    async def test_counts_queries_under_asgi(self):
+        # the queries run in the threads of `sync_to_async`, not the event loop's
+        await self.async_client.get(reverse("async-task-detail", args=[self.task.id]), headers=self.headers)
+        self.assertEqual(self.recorded_queries("async-task-detail"), 2)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TransactionTestCase):
+    # not `TestCase`, whose transaction would keep every read on the primary
+    def setUp(self):
+        self.user = User(email="owner@example.com")
+        self.factory = RequestFactory()
+        self.addCleanup(cache.clear)
+
+    def read_database(self, method, user=None, atomic=False):
+        """
+        Database the reads of a request go to, once its user is authenticated.
+        """
+        def view(request):
+            request.user = user
+            if atomic:
+                with transaction.atomic():
+                    return router.db_for_read(Task)
+            return router.db_for_read(Task)
+        return ReplicaRoutingMiddleware(view)(getattr(self.factory, method)("/"))
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.read_database("get", self.user), "replica")
+        self.assertEqual(self.read_database("get", self.user, atomic=True), "default")
+        self.assertEqual(self.read_database("post", self.user), "default")
+        self.assertEqual(router.db_for_read(Task), "default")
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        other = User(email="other@example.com")
+        self.read_database("patch", self.user)
+        self.assertEqual(self.read_database("get", self.user), "default")
+        self.assertEqual(self.read_database("get", other), "replica")
+
+        cache.clear()
+        self.assertEqual(self.read_database("get", self.user), "replica")
@@ -7,8 +7,11 @@ from . import views
 urlpatterns = [
     # authentication
     path('token/', views.CustomTokenObtainPairView.as_view(), name='token-obtain'),
+    path('token/async/', views.AsyncTokenObtainPairView.as_view(), name='async-token-obtain'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token-verify'),
+    # monitoring
+    path('metrics/', views.Metrics.as_view(), name='metrics'),
     # modules
     path('users/', include('users.urls')),
     path('tasks/', include('tasks.urls')),
@@ -1,5 +1,20 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from api.metrics import render_metrics
+from api.permissions import HasMetricsToken
+from api.renderers import FastJSONRenderer
 from api.serializers import CustomTokenObtainPairSerializer
 
 
@@ -8,3 +23,119 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Get JWT access and refresh tokens for authentication and authorization
     """
     serializer_class = CustomTokenObtainPairSerializer
+
+
+class Metrics(APIView):
+    """
+    Per-endpoint request metrics in the Prometheus text exposition format
+    """
+    allowed_methods = ['GET']
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of `APIView` for read endpoints served under ASGI.
+    Authenticators and permissions are awaited when they provide async
+    implementations, and responses are rendered with DRF's JSON renderer so the
+    payload matches the synchronous views byte for byte.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    renderer_class = FastJSONRenderer
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = Request(request, parsers=self.get_parsers(), authenticators=())
+        try:
+            await self.perform_authentication(self.request)
+            await self.check_permissions(self.request)
+            return await super().dispatch(self.request, *args, **kwargs)
+        except Http404 as exc:
+            return self.handle_exception(exceptions.NotFound(*exc.args))
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def get_parsers(self):
+        return [parser() for parser in self.parser_classes]
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    async def perform_authentication(self, request):
+        self.authenticators = self.get_authenticators()
+        for authenticator in self.authenticators:
+            if hasattr(authenticator, "aauthenticate"):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+        request.user, request.auth = AnonymousUser(), None
+
+    async def check_permissions(self, request):
+        for permission in self.get_permissions():
+            allowed = permission.has_permission(request, self)
+            if not (await allowed if isawaitable(allowed) else allowed):
+                self.permission_denied(request, permission)
+
+    async def check_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            allowed = permission.has_object_permission(request, self, obj)
+            if not (await allowed if isawaitable(allowed) else allowed):
+                self.permission_denied(request, permission)
+
+    def permission_denied(self, request, permission):
+        if not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(detail=getattr(permission, "message", None))
+
+    def handle_exception(self, exc):
+        response = self.render(
+            exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail},
+            status=exc.status_code,
+        )
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticator = self.authenticators[0] if self.authenticators else None
+            authenticate_header = authenticator.authenticate_header(self.request) if authenticator else None
+            if authenticate_header:
+                response["WWW-Authenticate"] = authenticate_header
+            else:
+                response.status_code = 403
+        return response
+
+    def render(self, data, status=200):
+        renderer = self.renderer_class()
+        return HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+
+
+class AsyncTokenObtainPairView(AsyncAPIView):
+    """
+    Async variant of `CustomTokenObtainPairView`. Password hashing runs in the bounded
+    hashing pool, so a burst of logins does not stall the event loop.
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    async def post(self, request):
+        # field errors shaped like the sync view's, without `validate`, which would
+        # authenticate synchronously
+        attrs = CustomTokenObtainPairSerializer(data=request.data).to_internal_value(request.data)
+        user = await aauthenticate(email=attrs["email"], password=attrs["password"])
+        if user is None:
+            return self.render(
+                {"non_field_errors": ["Invalid email address or password."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.render(CustomTokenObtainPairSerializer.get_token_data(user))
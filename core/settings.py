@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +47,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests slower than this are logged together with their slowest SQL statements
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', '500'))
+
+# Bearer token required to scrape /api/metrics/, the endpoint is disabled when unset
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -65,7 +74,7 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": os.getenv('DATABASE_ENGINE', 'django.db.backends.postgresql'),
         "NAME": os.getenv('DATABASE_NAME'),
         "USER": os.getenv('DATABASE_USER'),
         "PASSWORD": os.getenv('DATABASE_PASSWORD'),
@@ -74,6 +83,60 @@ DATABASES = {
     }
 }
 
+# How database connections are reused between requests:
+# - "persistent" keeps each worker thread's connection open for up to DATABASE_CONN_MAX_AGE
+#   seconds and checks it is still usable before reusing it. WSGI only: under ASGI requests
+#   do not keep to one thread, and each thread would hold a connection of its own.
+# - "pool" (PostgreSQL with psycopg 3 and psycopg_pool installed) shares a pool of up to
+#   DATABASE_POOL_MAX_SIZE checked connections, recycled after DATABASE_CONN_MAX_AGE
+#   seconds. Prefer it under ASGI.
+# - "none" (the default, safe under any server) opens a new connection for every request
+DATABASE_CONNECTION_MODES = ["persistent", "pool", "none"]
+DATABASE_CONNECTION_MODE = os.getenv('DATABASE_CONNECTION_MODE', 'none')
+DATABASE_CONN_MAX_AGE = int(os.getenv('DATABASE_CONN_MAX_AGE', 600))
+DATABASE_POOL_MIN_SIZE = int(os.getenv('DATABASE_POOL_MIN_SIZE', 2))
+DATABASE_POOL_MAX_SIZE = int(os.getenv('DATABASE_POOL_MAX_SIZE', 10))
+# Seconds a request waits for a pooled connection before failing
+DATABASE_POOL_TIMEOUT = int(os.getenv('DATABASE_POOL_TIMEOUT', 10))
+
+if DATABASE_CONNECTION_MODE not in DATABASE_CONNECTION_MODES:
+    raise ImproperlyConfigured(f"DATABASE_CONNECTION_MODE must be one of {', '.join(DATABASE_CONNECTION_MODES)}")
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+if DATABASE_CONNECTION_MODE == 'persistent':
+    DATABASES["default"]["CONN_MAX_AGE"] = DATABASE_CONN_MAX_AGE
+elif DATABASE_CONNECTION_MODE == 'pool':
+    if not DATABASES["default"]["ENGINE"].endswith("postgresql"):
+        raise ImproperlyConfigured("DATABASE_CONNECTION_MODE 'pool' requires PostgreSQL")
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": DATABASE_POOL_MIN_SIZE,
+            "max_size": DATABASE_POOL_MAX_SIZE,
+            "max_lifetime": DATABASE_CONN_MAX_AGE,
+            "timeout": DATABASE_POOL_TIMEOUT,
+        },
+    }
+
+# Comma-separated read replicas of the default database, given by host, or by file with
+# SQLite (e.g. a copy of the primary's file, to try the routing locally). Everything else
+# is the primary's. Reads of safe-method requests go to a replica, see `api.routers`.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    location = {"NAME": replica} if DATABASES["default"]["ENGINE"].endswith("sqlite3") else {"HOST": replica}
+    DATABASES[f"replica_{index}"] = {**DATABASES["default"], **location, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Seconds a user's reads stay on the primary after a write, covering the replication lag
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', 10))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        "LOCATION": os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -89,14 +152,49 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New passwords are hashed with PASSWORD_HASHER, the other hashers only verify
+# existing hashes, which are upgraded to the preferred hasher on the next login.
+PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'users.hashers.ScryptPasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'scrypt')
+
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(f"PASSWORD_HASHER must be one of {', '.join(PASSWORD_HASHER_CLASSES)}")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+SCRYPT_WORK_FACTOR = int(os.getenv('SCRYPT_WORK_FACTOR', 2 ** 14))
+SCRYPT_BLOCK_SIZE = int(os.getenv('SCRYPT_BLOCK_SIZE', 8))
+SCRYPT_PARALLELISM = int(os.getenv('SCRYPT_PARALLELISM', 5))
+
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 102400))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 8))
+
+# Threads hashing passwords for the async views, see `users.hashers.run_hasher`
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+
+AUTHENTICATION_BACKENDS = [
+    'users.backends.ModelBackend',
+]
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -105,8 +203,30 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': False,
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.CustomTokenRefreshSerializer',
+    'TOKEN_VERIFY_SERIALIZER': 'api.serializers.CustomTokenVerifySerializer',
 }
 
+# Maximum number of verified tokens kept in memory by each process, 0 disables the cache
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv('VERIFIED_TOKEN_CACHE_SIZE', 10000))
+
+# Authenticate requests and refresh tokens from the token claims alone, without loading the
+# user. Deactivated, demoted and deleted users are then only locked out by the revocation
+# entries kept in the default cache, so it must be shared by every process and persistent
+# (e.g. Redis with persistence, or the database cache); a per-process cache fails the checks.
+STATELESS_AUTHENTICATION = os.getenv('STATELESS_AUTHENTICATION', 'false').lower() == 'true'
+
+# Fan-out of the task change feed: `tasks.events.InProcessBroker` serves a single process,
+# `tasks.events.PostgresBroker` relays events between processes with LISTEN/NOTIFY
+TASK_EVENTS_BROKER = os.getenv('TASK_EVENTS_BROKER', 'tasks.events.InProcessBroker')
+# Seconds of silence after which a keepalive comment is sent on an event stream
+TASK_EVENTS_KEEPALIVE = int(os.getenv('TASK_EVENTS_KEEPALIVE', 15))
+# Events buffered per stream before a slow client is told to resync
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv('TASK_EVENTS_QUEUE_SIZE', 100))
+
+# Days deleted tasks are remembered for delta sync, clients offline for longer sync from scratch
+TASK_TOMBSTONE_RETENTION_DAYS = int(os.getenv('TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Todo API',
     'DESCRIPTION': 'Api for task management in a kanban manner',
@@ -129,3 +249,38 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# "full" (default) or "api". The API profile serves the JWT API only: no admin, sessions,
+# messages, CSRF, static files, browsable API or schema/docs, so workers start faster.
+SETTINGS_PROFILES = ["full", "api"]
+SETTINGS_PROFILE = os.getenv('SETTINGS_PROFILE', 'full')
+
+if SETTINGS_PROFILE not in SETTINGS_PROFILES:
+    raise ImproperlyConfigured(f"SETTINGS_PROFILE must be one of {', '.join(SETTINGS_PROFILES)}")
+if SETTINGS_PROFILE == 'api':
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if app not in [
+            'drf_spectacular',
+            'django.contrib.admin',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+            'django.contrib.staticfiles',
+        ]
+    ]
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE if middleware not in [
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        ]
+    ]
+    TEMPLATES[0]['OPTIONS']['context_processors'] = [
+        'django.template.context_processors.request',
+    ]
+    REST_FRAMEWORK.update({
+        # `extend_schema` subclasses this at import time, DRF's own is already loaded
+        'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.openapi.AutoSchema',
+        'DEFAULT_RENDERER_CLASSES': ('api.renderers.FastJSONRenderer',),
+    })
@@ -1,16 +1,36 @@
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 urlpatterns = [
     path('api/', include('api.urls')),
 ]
 
+
+def spectacular_view(name, **initkwargs):
+    """
+    drf-spectacular view imported on its first request, so that workers only load
+    the schema generator when the docs are actually used.
+    """
+    view = None
+
+    def lazy_view(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            from drf_spectacular import views
+            view = getattr(views, name).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return lazy_view
+
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# the docs need the drf_spectacular app, which the API-only profile leaves out
+if settings.DEBUG and 'drf_spectacular' in settings.INSTALLED_APPS:
     urlpatterns += [
-        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-        path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+        path('api/schema/', spectacular_view('SpectacularAPIView'), name='schema'),
+        path('api/docs/', spectacular_view('SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+        path('api/redoc/', spectacular_view('SpectacularRedocView', url_name='schema'), name='redoc'),
     ]
@@ -0,0 +1,85 @@
+from time import time_ns
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from tasks.models import Task, TaskStatus
+
+# The summary is stored under the user's current version, which invalidation bumps: a
+# summary computed from rows read before a change committed is stored under a version
+# that is already outdated, so it is never served.
+SUMMARY_CACHE_KEY = "tasks:summary:{}:{}"
+SUMMARY_VERSION_KEY = "tasks:summary-version:{}"
+SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+
+def count_tasks(user_id):
+    return Task.objects.filter(user_id=user_id).values("status").annotate(count=Count("id")).order_by()
+
+
+def get_summary_version(user_id):
+    """
+    Version of the user's cached summary. It starts from the clock so that a version
+    evicted from the cache is never reused.
+    """
+    key = SUMMARY_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_summary_version(user_id):
+    key = SUMMARY_VERSION_KEY.format(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def get_task_summary(user_id):
+    """
+    Number of tasks the user has in each status, served from the cache when possible.
+    The version is read before the tasks are counted.
+    """
+    key = SUMMARY_CACHE_KEY.format(user_id, get_summary_version(user_id))
+    summary = cache.get(key)
+    if summary is None:
+        summary = {s.value: 0 for s in TaskStatus}
+        for row in count_tasks(user_id):
+            summary[TaskStatus(row["status"]).value] = row["count"]
+        cache.set(key, summary, timeout=SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+async def aget_task_summary(user_id):
+    """
+    Async variant of `get_task_summary`.
+    """
+    key = SUMMARY_CACHE_KEY.format(user_id, await aget_summary_version(user_id))
+    summary = await cache.aget(key)
+    if summary is None:
+        summary = {s.value: 0 for s in TaskStatus}
+        async for row in count_tasks(user_id):
+            summary[TaskStatus(row["status"]).value] = row["count"]
+        await cache.aset(key, summary, timeout=SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_task_summary(user_id):
+    """
+    Bump the summary version once the current transaction commits, so that it is never
+    rebuilt from rows that are about to change.
+    """
+    transaction.on_commit(lambda: bump_summary_version(user_id))
+
+
+def bump_summary_version(user_id):
+    key = SUMMARY_VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted, any new version is newer than the summaries stored
+        cache.add(key, time_ns(), timeout=None)
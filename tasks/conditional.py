@@ -0,0 +1,76 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import now
+
+from tasks.serializers import HUMANIZED
+
+
+def representation_time():
+    """
+    Task representations include `humanized_time`, which can change every minute even
+    when no row does, so their validators are also tied to the current minute.
+    """
+    return now().replace(second=0, microsecond=0)
+
+
+def make_etag(*parts):
+    return quote_etag(md5("|".join(str(part) for part in parts).encode()).hexdigest())
+
+
+def task_list_etag(request, task_status, change_sequence, time_format):
+    """
+    ETag of a page of a status column, given the last number of the user's task
+    change sequence, which every create, update, transition and delete advances.
+    Raw time formats do not depend on the current minute.
+
+    Lists have no Last-Modified: deleting a task changes the list without leaving
+    a later `updated_at` behind.
+    """
+    represented_at = representation_time() if time_format == HUMANIZED else None
+    return make_etag(
+        task_status.value, change_sequence, request.user.email, represented_at, time_format,
+        request.query_params.get("cursor"), request.query_params.get("page_size"),
+    )
+
+
+def task_detail_validators(task, time_format):
+    if time_format != HUMANIZED:
+        return make_etag(task.id, task.updated_at, time_format), task.updated_at
+    represented_at = representation_time()
+    return make_etag(task.id, task.updated_at, represented_at), max(task.updated_at, represented_at)
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    """
+    Answer `If-None-Match` / `If-Modified-Since` with a 304 before anything is
+    serialized, otherwise build the response with `get_response` and attach the
+    validators to it. `last_modified` may be `None`.
+    """
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = get_response()
+    return add_validators(response, etag, last_modified)
+
+
+async def aconditional_response(request, etag, last_modified, get_response):
+    """
+    Async variant of `conditional_response`, `get_response` being a coroutine function.
+    """
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await get_response()
+    return add_validators(response, etag, last_modified)
+
+
+def add_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+    return response
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+from django.utils.timezone import get_current_timezone
+
+from api.renderers import FastJSONRenderer
+from api.serializers import isoformat
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+TRANSITIONED = "transitioned"
+DELETED = "deleted"
+# Sent to a subscriber that fell too far behind and missed events
+RESYNC = "resync"
+
+
+def task_event(kind, task, fields=None, **extra):
+    """
+    Event describing a change to `task`. Created and updated events carry the task,
+    or only the given `fields` of it when just those were saved, transitions only
+    the status change, and deletions only the id.
+    """
+    data = {"id": str(task.id)}
+    timezone = get_current_timezone()
+    if kind in (CREATED, UPDATED):
+        data.update(
+            detail=task.detail,
+            priority=task.priority,
+            status=task.status.value,
+            created_at=isoformat(task.created_at, timezone),
+            updated_at=isoformat(task.updated_at, timezone),
+        )
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name == "id" or name in fields}
+    elif kind == TRANSITIONED:
+        data.update(status=task.status.value, updated_at=isoformat(task.updated_at, timezone))
+    data.update(extra)
+    return {"event": kind, "data": data}
+
+
+def publish_task_event(kind, task, fields=None, **extra):
+    """
+    Publish an event to the subscribers of the task's owner once the current
+    transaction commits, so that rolled back changes are never announced.
+    """
+    event, user_id = task_event(kind, task, fields, **extra), task.user_id
+    transaction.on_commit(lambda: get_broker().publish(user_id, event), using=router.db_for_write(Task))
+
+
+class Subscription:
+    """
+    Events of one user for one stream, buffered in a bounded queue owned by the
+    event loop serving the stream.
+    """
+
+    def __init__(self, user_id, max_size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def put(self, event):
+        """
+        Runs on the subscriber's loop. A full queue means the client stopped reading:
+        its backlog is replaced by a single `resync` event telling it to reload.
+        """
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"event": RESYNC, "data": {}})
+
+    async def get(self, timeout=None):
+        """
+        Next event, or `None` when nothing arrived within `timeout` seconds.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """
+    Delivers events to the streams served by the current process. Enough for a
+    single ASGI worker, use `PostgresBroker` when running several.
+
+    An idle stream costs a queue and a suspended coroutine, no thread or database
+    connection, so a worker can hold thousands of them.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        """
+        Must be called from the event loop that will read the subscription.
+        """
+        subscription = Subscription(user_id, settings.TASK_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, user_id, event):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id, event):
+        """
+        Hand the event to every local stream of the user. Safe to call from any
+        thread, each subscription is only touched from its own loop.
+        """
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:  # the loop was closed under a stream that did not clean up
+                self.unsubscribe(subscription)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Publishes with `NOTIFY` so that every process running a `PostgresBroker`
+    receives the event and delivers it to its own streams. Each process holds a
+    single extra connection, listening from a background thread started with the
+    first stream, however many streams it serves.
+
+    NOTIFY payloads are limited to 8000 bytes: larger events are sent without the
+    task fields and clients reload the task.
+    """
+
+    channel = "task_events"
+    max_payload = 7900
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def subscribe(self, user_id):
+        with self.lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.listener = threading.Thread(target=self.listen, name="task-events-listener", daemon=True)
+                self.listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id, event):
+        payload = json.dumps({"user": str(user_id), **event}, separators=(",", ":"))
+        if len(payload.encode()) > self.max_payload:
+            payload = json.dumps({"user": str(user_id), "event": event["event"], "data": {"id": event["data"]["id"]}})
+        using = router.db_for_write(Task)
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def listen(self):
+        """
+        Forward notifications to the local streams, reconnecting if the connection
+        drops. Runs for the lifetime of the process.
+        """
+        while True:
+            try:
+                for payload in self.notifications():
+                    message = json.loads(payload)
+                    user_id = Task._meta.get_field("user").to_python(message.pop("user"))
+                    self.deliver(user_id, message)
+            except Exception:
+                logger.exception("Task event listener failed, reconnecting")
+                threading.Event().wait(1)
+
+    def notifications(self):
+        """
+        Payloads received on the channel, from a dedicated autocommit connection.
+        """
+        wrapper = connections[router.db_for_write(Task)]
+        connection = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {self.channel}")
+            if callable(getattr(connection, "notifies", None)):  # psycopg 3
+                for notify in connection.notifies():
+                    yield notify.payload
+                return
+            while True:  # psycopg2
+                if select.select([connection], [], [], 60) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    yield connection.notifies.pop(0).payload
+        finally:
+            connection.close()
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.TASK_EVENTS_BROKER)()
+
+
+def format_event(event):
+    """
+    Server-sent events framing of an event.
+    """
+    data = FastJSONRenderer().render(event["data"]).decode()
+    return f"event: {event['event']}\ndata: {data}\n\n".encode()
+
+
+async def event_stream(user_id, keepalive=None):
+    """
+    Server-sent events for `user_id` until the client disconnects, which cancels
+    the generator and drops the subscription. A comment is sent when the stream has
+    been idle for `keepalive` seconds so proxies do not close the connection.
+    """
+    keepalive = settings.TASK_EVENTS_KEEPALIVE if keepalive is None else keepalive
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    try:
+        yield b": connected\n\n"
+        while True:
+            event = await subscription.get(timeout=keepalive)
+            yield b": keepalive\n\n" if event is None else format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
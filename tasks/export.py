@@ -0,0 +1,93 @@
+import csv
+
+from django.utils.timezone import get_current_timezone
+
+from api.renderers import FastJSONRenderer
+from api.serializers import isoformat
+
+EXPORT_FIELDS = ["id", "user", "detail", "priority", "status", "created_at", "updated_at"]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class Echo:
+    """
+    File-like object handing back what is written to it, so that `csv.writer`
+    produces lines for a streaming response instead of filling a buffer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_values(queryset):
+    # `.values()` rather than `.values_list()`, whose rows `aiterator()` would fetch
+    # outside of a thread
+    return queryset.order_by("created_at", "id").values(
+        "id", "user__email", "detail", "priority", "status", "created_at", "updated_at"
+    )
+
+
+def format_row(values, timezone):
+    return {
+        "id": str(values["id"]),
+        "user": values["user__email"],
+        "detail": values["detail"],
+        "priority": values["priority"],
+        "status": values["status"].value,
+        "created_at": isoformat(values["created_at"], timezone),
+        "updated_at": isoformat(values["updated_at"], timezone),
+    }
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Flat representation of every task of the queryset, read through a server-side
+    cursor `chunk_size` rows at a time so memory does not grow with the export.
+    """
+    timezone = get_current_timezone()
+    for values in export_values(queryset).iterator(chunk_size=chunk_size):
+        yield format_row(values, timezone)
+
+
+async def aexport_rows(queryset, chunk_size=2000):
+    """
+    Async variant of `export_rows`.
+    """
+    timezone = get_current_timezone()
+    async for values in export_values(queryset).aiterator(chunk_size=chunk_size):
+        yield format_row(values, timezone)
+
+
+def line_writer(export_format):
+    """
+    The header line of the format, if any, and a function rendering a row as a line.
+    """
+    if export_format == "csv":
+        writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+        return writer.writeheader(), writer.writerow
+    renderer = FastJSONRenderer()
+    return None, lambda row: renderer.render(row) + b"\n"
+
+
+def export_lines(queryset, export_format):
+    header, render_line = line_writer(export_format)
+    if header is not None:
+        yield header
+    for row in export_rows(queryset):
+        yield render_line(row)
+
+
+async def aexport_lines(queryset, export_format):
+    """
+    Async variant of `export_lines`, for ASGI servers, which would otherwise read a
+    sync iterator to the end before sending anything.
+    """
+    header, render_line = line_writer(export_format)
+    if header is not None:
+        yield header
+    async for row in aexport_rows(queryset):
+        yield render_line(row)
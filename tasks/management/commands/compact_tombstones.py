@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from tasks.sync import compact_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones of tasks deleted more than --days ago. Clients whose sync "
+        "cursor predates them have to sync from scratch. Meant to run daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.TASK_TOMBSTONE_RETENTION_DAYS,
+            help="Age in days of the tombstones to delete (TASK_TOMBSTONE_RETENTION_DAYS by default)"
+        )
+
+    def handle(self, *args, **options):
+        deleted = compact_tombstones(now() - timedelta(days=options["days"]))
+        self.stdout.write(f"Deleted {deleted} tombstones")
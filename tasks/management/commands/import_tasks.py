@@ -0,0 +1,46 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.imports import IMPORT_FORMATS, import_tasks, read_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks from a CSV (with a header line) or NDJSON file. Rows are validated "
+        "and inserted in chunks, and the errors of each chunk are reported by line."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS, help="File format, guessed from the extension by default"
+        )
+        parser.add_argument("--user", help="Email of the owner of the rows that do not name a user")
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000, help="Number of rows validated and inserted at once"
+        )
+
+    def handle(self, *args, **options):
+        import_format = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}, use --format")
+
+        default_user = None
+        if options["user"]:
+            default_user = User.objects.filter(email=options["user"]).first()
+            if default_user is None:
+                raise CommandError(f"User {options['user']} not found")
+
+        created = failed = 0
+        start = perf_counter()
+        with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+            for chunk in import_tasks(read_rows(stream, import_format), default_user, options["chunk_size"]):
+                created += chunk["created"]
+                failed += chunk["rows"] - chunk["created"]
+                for error in chunk["errors"]:
+                    self.stderr.write(f"chunk {chunk['chunk']}, line {error['line']}: {error['errors']}")
+        self.stdout.write(f"Imported {created} tasks ({failed} rows failed) in {perf_counter() - start:.1f}s")
@@ -0,0 +1,50 @@
+import tasks.models
+from django.db import migrations, models
+
+
+STATUS_CODES = [("todo", 1), ("doing", 2), ("done", 3), ("on hold", 4)]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_status_order_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunSQL(
+            sql="UPDATE tasks_task SET status_code = CASE status {} END".format(
+                " ".join(f"WHEN '{value}' THEN {code}" for value, code in STATUS_CODES)
+            ),
+            reverse_sql="UPDATE tasks_task SET status = CASE status_code {} END".format(
+                " ".join(f"WHEN {code} THEN '{value}'" for value, code in STATUS_CODES)
+            ),
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='status',
+        ),
+        migrations.RenameField(
+            model_name='task',
+            old_name='status_code',
+            new_name='status',
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=tasks.models.TaskStatusField(default=tasks.models.TaskStatus['TODO']),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', '-priority', 'created_at'], name='task_user_status_order_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector_idx')
+
+# The vector is computed by the database on every insert (including COPY) and on
+# every update touching `detail`, so no write path can leave it stale.
+CREATE_TRIGGER = """
+    CREATE TRIGGER tasks_task_search_vector_update
+    BEFORE INSERT OR UPDATE OF detail ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(search_vector, 'pg_catalog.english', detail);
+    UPDATE tasks_task SET search_vector = to_tsvector('pg_catalog.english', detail);
+"""
+
+DROP_TRIGGER = "DROP TRIGGER IF EXISTS tasks_task_search_vector_update ON tasks_task;"
+
+
+def create_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGGER)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_status_smallint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Full-text search is PostgreSQL only, other databases fall back to LIKE
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+        # A GIN index on PostgreSQL, a plain index of the unused column elsewhere, as
+        # table rebuilds would create from the model anyway
+        migrations.AddIndex(model_name='task', index=SEARCH_INDEX),
+    ]
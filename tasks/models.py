@@ -1,12 +1,14 @@
-from datetime import timedelta
 import enum
 import uuid
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.dispatch import Signal
 from django.utils.timezone import now
-from enumfields import EnumField
 
 User = get_user_model()
 
@@ -20,38 +22,274 @@ class TaskStatus(enum.Enum):
     ON_HOLD = "on hold"
 
 
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
+def humanize_time(created_at, reference=None) -> str:
+    """
+    Human friendly age of a timestamp, e.g. "5 minutes ago" or "Yesterday". When
+    humanizing many timestamps, read the clock once and pass it as `reference` so
+    every row is bucketed against the same instant.
+    """
+    seconds = ((reference or now()) - created_at).total_seconds()
+    if seconds < MINUTE:
+        return "Just now"
+    elif seconds < HOUR:
+        minutes = int(seconds / MINUTE)
+        return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
+    elif seconds < DAY:
+        hours = int(seconds / HOUR)
+        return f"{hours} hour{'s' if hours > 1 else ''} ago"
+    elif seconds < 2 * DAY:
+        return "Yesterday"
+    elif seconds < WEEK:
+        days = int(seconds // DAY)
+        return f"{days} day{'s' if days > 1 else ''} ago"
+    elif seconds < 4 * WEEK:
+        weeks = int(seconds // WEEK)
+        return f"{weeks} week{'s' if weeks > 1 else ''} ago"
+    else:
+        return created_at.strftime("%b %d, %Y")
+
+
+# Sent by `Task.apply_transition`, whose conditional UPDATE sends no `post_save`.
+# Receivers get the moved `instance` and its `previous_status`.
+status_changed = Signal()
+
+
+class TransitionConflict(Exception):
+    """
+    Raised when a task is no longer in the status a transition was computed from.
+    """
+
+
+class TaskStatusField(models.PositiveSmallIntegerField):
+    """
+    Stores a `TaskStatus` as a small integer while exposing the enum member in Python.
+    The codes are what is persisted, so existing ones must never be renumbered.
+    """
+    codes = {
+        TaskStatus.TODO: 1,
+        TaskStatus.DOING: 2,
+        TaskStatus.DONE: 3,
+        TaskStatus.ON_HOLD: 4,
+    }
+    statuses = {code: status for status, code in codes.items()}
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, TaskStatus):
+            return value
+        try:
+            if isinstance(value, int):
+                return self.statuses[value]
+            return TaskStatus(value)
+        except (KeyError, ValueError):
+            raise ValidationError(f"Invalid value for enum TaskStatus: {value}")
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if value is None:
+            return None
+        return self.codes[value]
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return value.value if value is not None else None
+
+
+def change_sequence_sql(connection):
+    """
+    The upsert behind `next_change_sequence`, taking the user id and the count as
+    parameters and returning the user's new last number.
+    """
+    quote_name = connection.ops.quote_name
+    table = quote_name(TaskSyncState._meta.db_table)
+    user_column, sequence_column = quote_name("user_id"), quote_name("sequence")
+    return (
+        f"INSERT INTO {table} ({user_column}, {sequence_column}, {quote_name('compacted_through')}) "
+        f"VALUES (%s, %s, 0) ON CONFLICT ({user_column}) "
+        f"DO UPDATE SET {sequence_column} = {table}.{sequence_column} + excluded.{sequence_column} "
+        f"RETURNING {sequence_column}"
+    )
+
+
+def next_change_sequence(user_id, count=1, using=None):
+    """
+    Reserve `count` numbers of the user's task change sequence and return the last
+    one. The counter row stays locked until the transaction commits, so a user's
+    writes commit in sequence order and a client that has synced up to a number can
+    never miss a lower one committed later. Take it before locking any task row.
+
+    This costs every write one more statement, and a delete two with its tombstone.
+    Transitions, the most frequent write, fold it into their UPDATE on PostgreSQL.
+    """
+    using = using or router.db_for_write(TaskSyncState)
+    connection = connections[using]
+    user_id = TaskSyncState._meta.get_field("user").get_db_prep_value(user_id, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(change_sequence_sql(connection), [user_id, count])
+        return cursor.fetchone()[0]
+
+
 class Task(models.Model):
     id = models.UUIDField(primary_key=True, unique=False, editable=False, default=uuid.uuid4)
     detail = models.TextField()
     priority = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
-    status = EnumField(TaskStatus, default=TaskStatus.TODO)
+    status = TaskStatusField(default=TaskStatus.TODO)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="tasks")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained from `detail` by a database trigger on PostgreSQL, unused elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Number of the task's last change in its owner's change sequence, 0 for tasks
+    # that have not changed since the sequence was introduced.
+    change_seq = models.BigIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["-priority", "created_at"]
+        indexes = [
+            models.Index(fields=["user", "status", "-priority", "created_at"], name="task_user_status_order_idx"),
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),
+            models.Index(fields=["user", "change_seq", "id"], name="task_user_change_seq_idx"),
+        ]
 
     def __str__(self):
         return self.detail
-    
+
+    def save(self, *args, **kwargs):
+        """
+        Every save takes the next number of the owner's change sequence, in the same
+        transaction as the write.
+        """
+        using = kwargs.get("using") or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self.change_seq = next_change_sequence(self.user_id, using=using)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "change_seq"}
+            super().save(*args, **kwargs)
+
+    def get_transition(self, on_hold=False):
+        """
+        The status the task would move to along TODO -> DOING -> DONE, or to ON_HOLD
+        unless it is done, with a message describing the outcome. The status is None
+        when the task cannot move.
+        """
+        if on_hold:
+            if self.status in [TaskStatus.DONE, TaskStatus.ON_HOLD]:
+                return None, f"Task is already {self.status.value}"
+            return TaskStatus.ON_HOLD, "Task has been put on-hold"
+        if self.status == TaskStatus.TODO:
+            target = TaskStatus.DOING
+        elif self.status == TaskStatus.DOING:
+            target = TaskStatus.DONE
+        else:
+            return None, f"Task is {'already ' if self.status == TaskStatus.DONE else ''}{self.status.value}"
+        return target, f"Task has been moved to `{target.value}`"
+
+    def transition(self, on_hold=False):
+        """
+        Apply the transition in memory only. Returns whether the task moved and a
+        message describing the outcome.
+        """
+        target, message = self.get_transition(on_hold)
+        if target is None:
+            return False, message
+        self.status = target
+        return True, message
+
+    def apply_transition(self, on_hold=False):
+        """
+        Apply the transition with a single `UPDATE ... WHERE id AND user_id AND status`,
+        writing only `status`, `updated_at` and `change_seq`. The update only matches while the task
+        is still in the status it was read with, so concurrent transitions cannot both
+        move it: the loser gets `TransitionConflict`. Returns like `transition`.
+        """
+        target, message = self.get_transition(on_hold)
+        if target is None:
+            return False, message
+        previous_status, updated_at = self.status, now()
+        using = router.db_for_write(Task, instance=self)
+        # a conflict leaves a gap in the sequence, which is harmless
+        if connections[using].vendor == "postgresql":
+            change_seq = self.update_status_in_sequence(previous_status, target, updated_at, using)
+        else:
+            with transaction.atomic(using=using, savepoint=False):
+                change_seq = next_change_sequence(self.user_id, using=using)
+                updated = Task.objects.using(using).filter(
+                    id=self.id, user_id=self.user_id, status=previous_status
+                ).update(status=target, updated_at=updated_at, change_seq=change_seq)
+            change_seq = change_seq if updated else None
+        if change_seq is None:
+            raise TransitionConflict("Task status was changed by another request, reload it and try again")
+        self.status, self.updated_at, self.change_seq = target, updated_at, change_seq
+        status_changed.send(sender=Task, instance=self, previous_status=previous_status)
+        return True, message
+
+    def update_status_in_sequence(self, previous_status, target, updated_at, using):
+        """
+        The conditional UPDATE of `apply_transition` as a single statement, reserving
+        the change sequence number in a data-modifying CTE (PostgreSQL only). The
+        counter row is still locked before the task row, which the UPDATE only locks
+        once it computes the new values. Returns the number, None when the task was
+        no longer in `previous_status`.
+        """
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        field = Task._meta.get_field
+        status_column = quote_name("status")
+        sql = (
+            f"WITH {quote_name('reserved')} AS ({change_sequence_sql(connection)}) "
+            f"UPDATE {quote_name(Task._meta.db_table)} SET {status_column} = %s, {quote_name('updated_at')} = %s, "
+            f"{quote_name('change_seq')} = (SELECT {quote_name('sequence')} FROM {quote_name('reserved')}) "
+            f"WHERE {quote_name('id')} = %s AND {quote_name('user_id')} = %s AND {status_column} = %s "
+            f"RETURNING {quote_name('change_seq')}"
+        )
+        user_id = field("user").get_db_prep_value(self.user_id, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user_id, 1,
+                field("status").get_db_prep_value(target, connection),
+                field("updated_at").get_db_prep_value(updated_at, connection),
+                field("id").get_db_prep_value(self.id, connection),
+                user_id,
+                field("status").get_db_prep_value(previous_status, connection),
+            ])
+            row = cursor.fetchone()
+        return row[0] if row else None
+
     @property
     def humanized_time(self) -> str:
-        diff = now() - self.created_at
-        if diff < timedelta(minutes=1):
-            return "Just now"
-        elif diff < timedelta(hours=1):
-            minutes = int(diff.total_seconds() / 60)
-            return f"{minutes} minute{'s' if minutes > 1 else ''} ago"
-        elif diff < timedelta(days=1):
-            hours = int(diff.total_seconds() / 3600)
-            return f"{hours} hour{'s' if hours > 1 else ''} ago"
-        elif diff < timedelta(days=2):
-            return "Yesterday"
-        elif diff < timedelta(weeks=1):
-            days = diff.days
-            return f"{days} day{'s' if days > 1 else ''} ago"
-        elif diff < timedelta(weeks=4):
-            weeks = diff.days // 7
-            return f"{weeks} week{'s' if weeks > 1 else ''} ago"
-        else:
-            return self.created_at.strftime("%b %d, %Y")
+        return humanize_time(self.created_at)
+
+
+class TaskSyncState(models.Model):
+    """
+    Per-user counter behind `Task.change_seq`, see `next_change_sequence`.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="task_sync_state")
+    sequence = models.BigIntegerField(default=0)
+    # Tombstones up to this sequence number were compacted, older cursors are expired.
+    compacted_through = models.BigIntegerField(default=0)
+
+
+class TaskTombstone(models.Model):
+    """
+    Record of a deleted task, telling syncing clients to drop their copy. Removed by
+    `compact_tombstones` after `TASK_TOMBSTONE_RETENTION_DAYS`.
+    """
+    task_id = models.UUIDField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_tombstones")
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "change_seq", "task_id"], name="tombstone_user_change_seq_idx"),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_at_idx"),
+        ]
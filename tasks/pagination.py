@@ -0,0 +1,22 @@
+from rest_framework.pagination import LimitOffsetPagination
+
+from api.pagination import KeysetPagination
+
+
+class TaskCursorPagination(KeysetPagination):
+    """
+    Keyset pagination over tasks, matching `Task.Meta.ordering` with the id as a
+    tie-breaker, backed by the `task_user_status_order_idx` index.
+    """
+
+    ordering = ("-priority", "created_at", "id")
+
+
+class TaskSearchPagination(LimitOffsetPagination):
+    """
+    Search results are ordered by rank, which does not make a stable keyset, and
+    are rarely paged deeply, so they use limit/offset pagination.
+    """
+
+    default_limit = 20
+    max_limit = 100
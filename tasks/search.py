@@ -0,0 +1,27 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+
+from tasks.models import Task
+
+# Must match the configuration used by the trigger maintaining `Task.search_vector`.
+SEARCH_CONFIG = "pg_catalog.english"
+
+
+def search_tasks(queryset, query):
+    """
+    Tasks of the queryset matching the search query, best matches first.
+    PostgreSQL ranks full-text matches of the GIN indexed `search_vector` and accepts
+    the web search syntax ("quoted phrases", `or`, `-word`). Other databases fall
+    back to requiring every word in `detail` and keep the default ordering.
+    """
+    if connections[queryset.db].vendor == "postgresql":
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "id")
+        )
+    for word in query.split():
+        queryset = queryset.filter(detail__icontains=word)
+    return queryset.order_by(*Task._meta.ordering, "id")
@@ -1,10 +1,34 @@
+from django.utils.timezone import get_current_timezone, now
 from rest_framework import serializers
 
-from api.serializers import EnumField
-from tasks.models import Task, TaskStatus
+from api.serializers import EnumField, RowSerializer, isoformat
+from tasks.models import Task, TaskStatus, humanize_time
+
+# How task times are represented. Clients that format times themselves can ask for
+# the raw `created_at` (ISO 8601 or a Unix timestamp) instead of `humanized_time`.
+HUMANIZED = "humanized"
+TIME_FORMATS = [HUMANIZED, "iso", "epoch"]
+
+
+def get_time_formatter(time_format):
+    """
+    Field name and formatting function of the task time for the given format. The
+    clock and the timezone are read once, so that a whole response is formatted
+    against the same instant.
+    """
+    if time_format == "iso":
+        timezone = get_current_timezone()
+        return "created_at", lambda created_at: isoformat(created_at, timezone)
+    if time_format == "epoch":
+        return "created_at", lambda created_at: created_at.timestamp()
+    reference = now()
+    return "humanized_time", lambda created_at: humanize_time(created_at, reference)
 
 
 class TaskSerializer(serializers.ModelSerializer):
+    """
+    Honours the `time_format` context entry, see `TIME_FORMATS`.
+    """
     user = serializers.ReadOnlyField(source="user.email")
     status = EnumField(enum_class=TaskStatus)
 
@@ -12,6 +36,36 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = ["id", "detail", "priority", "status", "user", "humanized_time"]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        time_format = self.context.get("time_format", HUMANIZED)
+        if time_format != HUMANIZED:
+            time_field, format_time = get_time_formatter(time_format)
+            del data["humanized_time"]
+            data[time_field] = format_time(instance.created_at)
+        return data
+
+
+class TaskRowSerializer(RowSerializer):
+    """
+    Fast-path equivalent of `TaskSerializer` for a single user's tasks.
+    """
+    fields = ["id", "detail", "priority", "status", "created_at"]
+
+    def __init__(self, user, time_format=HUMANIZED):
+        self.user_email = user.email
+        self.time_field, self.format_time = get_time_formatter(time_format)
+
+    def to_representation(self, row):
+        return {
+            "id": str(row["id"]),
+            "detail": row["detail"],
+            "priority": row["priority"],
+            "status": row["status"].value,
+            "user": self.user_email,
+            self.time_field: self.format_time(row["created_at"]),
+        }
+
 
 class TaskCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,3 +77,24 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["detail", "priority"]
+
+    def update(self, instance, validated_data):
+        """
+        Write only the edited fields, so that a concurrent transition is not reverted
+        to the status the task was read with.
+        """
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        return instance
+
+
+class TaskBulkOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["create", "transition", "delete"])
+    id = serializers.UUIDField(required=False)
+    on_hold = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        if attrs["op"] != "create" and "id" not in attrs:
+            raise serializers.ValidationError({"id": "This field is required."})
+        return attrs
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from tasks.cache import invalidate_task_summary
+from tasks.events import CREATED, DELETED, TRANSITIONED, UPDATED, publish_task_event
+from tasks.models import Task, TaskTombstone, next_change_sequence, status_changed
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(status_changed, sender=Task)
+def invalidate_summary_on_change(sender, instance, **kwargs):
+    invalidate_task_summary(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def publish_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # a partial save only vouches for the fields it wrote, e.g. not for a status
+    # changed meanwhile by a transition
+    if not raw:
+        publish_task_event(CREATED if created else UPDATED, instance, update_fields)
+
+
+@receiver(status_changed, sender=Task)
+def publish_transition(sender, instance, previous_status, **kwargs):
+    publish_task_event(TRANSITIONED, instance, previous_status=previous_status.value)
+
+
+@receiver(post_delete, sender=Task)
+def publish_delete(sender, instance, **kwargs):
+    publish_task_event(DELETED, instance)
+
+
+@receiver(pre_delete, sender=Task)
+def write_tombstone(sender, instance, using, origin=None, **kwargs):
+    # tasks deleted along with their user have nobody left to sync with
+    if isinstance(origin, User) or getattr(origin, "model", None) is User:
+        return
+    # taken before the task row is deleted, in the same order as every other write
+    change_seq = next_change_sequence(instance.user_id, using=using)
+    TaskTombstone.objects.using(using).create(task_id=instance.id, user_id=instance.user_id, change_seq=change_seq)
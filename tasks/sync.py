@@ -0,0 +1,100 @@
+import base64
+import binascii
+import json
+import uuid
+
+from django.db.models import Max, Q
+from django.db.models.functions import Greatest
+
+from tasks.models import TaskSyncState, TaskTombstone
+from tasks.serializers import TaskRowSerializer
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class ExpiredCursor(Exception):
+    """
+    The tombstones the cursor would need were compacted, the client has to sync
+    from scratch.
+    """
+
+
+def encode_cursor(position):
+    change_seq, task_id = position
+    data = [change_seq, str(task_id) if task_id else None]
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_cursor(encoded):
+    """
+    `(change_seq, task id)` of the last change the client has seen, the id being
+    `None` when only the sequence number matters.
+    """
+    try:
+        change_seq, task_id = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        if not isinstance(change_seq, int) or change_seq < 0:
+            raise ValueError
+        return change_seq, uuid.UUID(task_id) if task_id is not None else None
+    except (TypeError, ValueError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+
+
+def after(position, id_field):
+    """
+    Rows sorting after `position` in `(change_seq, id_field)` order.
+    """
+    change_seq, task_id = position
+    if task_id is None:
+        return Q(change_seq__gt=change_seq)
+    return Q(change_seq__gt=change_seq) | Q(change_seq=change_seq, **{f"{id_field}__gt": task_id})
+
+
+def get_changes(user, position=None, limit=500):
+    """
+    Up to `limit` changes of the user's tasks after `position`, in sequence order:
+    the `.values()` rows of created or modified tasks and the ids of deleted ones,
+    with the position of the last change and whether there are more.
+
+    Without a position every task is returned, the client has nothing to delete yet.
+    """
+    tasks = user.tasks.order_by("change_seq", "id").values(*TaskRowSerializer.fields, "change_seq")
+    if position is None:
+        changes = [(row["change_seq"], row["id"], row) for row in tasks[:limit + 1]]
+    else:
+        compacted_through = (
+            TaskSyncState.objects.filter(user=user).values_list("compacted_through", flat=True).first() or 0
+        )
+        if position[0] < compacted_through:
+            raise ExpiredCursor("Cursor expired, sync from scratch")
+        tombstones = user.task_tombstones.order_by("change_seq", "task_id").filter(after(position, "task_id"))
+        changes = sorted(
+            [(row["change_seq"], row["id"], row) for row in tasks.filter(after(position, "id"))[:limit + 1]]
+            + [(change_seq, task_id, None) for change_seq, task_id in
+               tombstones.values_list("change_seq", "task_id")[:limit + 1]],
+            key=lambda change: change[:2],
+        )
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        position = changes[-1][:2]
+    rows = [row for _, _, row in changes if row is not None]
+    deleted = [str(task_id) for _, task_id, row in changes if row is None]
+    return rows, deleted, position or (0, None), has_more
+
+
+def compact_tombstones(before):
+    """
+    Delete the tombstones written before `before`. Cursors older than the newest
+    compacted tombstone of their user are expired from then on. Returns the number
+    of tombstones deleted.
+    """
+    tombstones = TaskTombstone.objects.filter(deleted_at__lt=before)
+    for row in tombstones.values("user_id").annotate(change_seq=Max("change_seq")).order_by():
+        TaskSyncState.objects.filter(user_id=row["user_id"]).update(
+            compacted_through=Greatest("compacted_through", row["change_seq"])
+        )
+    deleted, _ = tombstones.delete()
+    return deleted
@@ -1,3 +1,646 @@
-from django.test import TestCase
+import asyncio
+import json
+import uuid
+from datetime import timedelta
+from time import sleep
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from tasks.cache import count_tasks, get_task_summary
+from tasks.events import get_broker
+from tasks.export import EXPORT_FIELDS
+from tasks.models import Task, TaskStatus, TaskStatusField, TaskTombstone, TransitionConflict, humanize_time
+from tasks.serializers import TaskSerializer, TaskUpdateSerializer
+from tasks.sync import compact_tombstones
+from users.models import User
+
+
+class TaskQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_tasks(self, count):
+        Task.objects.bulk_create(
+            Task(user=self.user, detail=f"task {i}", priority=i % 5 + 1) for i in range(count)
+        )
+
+    def list_tasks(self):
+        response = self.client.get(reverse("task-list"), {"status": TaskStatus.TODO.value})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_task_list_query_count_is_constant(self):
+        # one query for the change sequence (ETag), one for the page
+        self.create_tasks(2)
+        with self.assertNumQueries(2):
+            self.list_tasks()
+
+        self.create_tasks(40)
+        with self.assertNumQueries(2):
+            response = self.list_tasks()
+        self.assertEqual(response.data["results"][0]["user"], self.user.email)
+
+    def test_cursor_pages_through_ties(self):
+        # equal priorities and creation times, only the id breaks the ties
+        Task.objects.bulk_create(Task(user=self.user, detail=f"task {i}", priority=i % 2 + 1) for i in range(7))
+        Task.objects.update(created_at=now())
+        expected = [str(task_id) for task_id in Task.objects.order_by("-priority", "created_at", "id")
+                    .values_list("id", flat=True)]
+        url, seen = f"{reverse('task-list')}?status={TaskStatus.TODO.value}&page_size=2", []
+        while url:
+            response = self.client.get(url)
+            seen += [task["id"] for task in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_task_detail_fetches_owner_in_same_query(self):
+        self.create_tasks(1)
+        task = Task.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("task-detail", args=[task.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user"], self.user.email)
+
+
+class TaskBoardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        other = User.objects.create_user("other@example.com", "password")
+        Task.objects.bulk_create([
+            *[Task(user=self.user, detail=f"todo {i}", priority=i % 5 + 1) for i in range(7)],
+            *[Task(user=self.user, detail=f"doing {i}", priority=1, status=TaskStatus.DOING) for i in range(2)],
+            Task(user=other, detail="theirs", priority=5),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_board(self, **params):
+        response = self.client.get(reverse("task-board"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_columns_are_limited_and_counted(self):
+        board = self.get_board(limit=3)
+        self.assertEqual(
+            {value: (column["count"], len(column["results"])) for value, column in board.items()},
+            {"todo": (7, 3), "doing": (2, 2), "done": (0, 0), "on hold": (0, 0)},
+        )
+
+    def test_columns_are_ordered_like_the_list(self):
+        Task.objects.filter(user=self.user).update(created_at=now())
+        board = self.get_board(limit=100)
+        for task_status in [TaskStatus.TODO, TaskStatus.DOING]:
+            expected = [str(task_id) for task_id in self.user.tasks.filter(status=task_status)
+                        .order_by("-priority", "created_at", "id").values_list("id", flat=True)]
+            self.assertEqual([task["id"] for task in board[task_status.value]["results"]], expected)
+
+    def test_board_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.get_board()
+        Task.objects.bulk_create(Task(user=self.user, detail="more", priority=2) for _ in range(30))
+        with self.assertNumQueries(1):
+            board = self.get_board()
+        self.assertEqual((board["todo"]["count"], len(board["todo"]["results"])), (37, 20))
+class TaskTimeFormatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(user=self.user, detail="task", priority=1)
+
+    def test_humanize_time_uses_reference(self):
+        reference = self.task.created_at + timedelta(minutes=5)
+        self.assertEqual(humanize_time(self.task.created_at, reference), "5 minutes ago")
+        self.assertEqual(humanize_time(self.task.created_at, reference + timedelta(days=1)), "Yesterday")
+
+    def test_raw_time_formats(self):
+        url = reverse("task-list")
+        humanized = self.client.get(url, {"status": TaskStatus.TODO.value}).data["results"][0]
+        self.assertEqual(humanized["humanized_time"], "Just now")
+
+        iso = self.client.get(url, {"status": TaskStatus.TODO.value, "time_format": "iso"}).data["results"][0]
+        self.assertNotIn("humanized_time", iso)
+        expected = TaskSerializer(self.task, context={"time_format": "iso"}).data["created_at"]
+        self.assertEqual(iso["created_at"], expected)
+
+        epoch = self.client.get(reverse("task-detail", args=[self.task.id]), {"time_format": "epoch"}).data
+        self.assertEqual(epoch["created_at"], self.task.created_at.timestamp())
+
+    def test_unknown_time_format(self):
+        expected = {"detail": "Invalid time_format, expected one of: humanized, iso, epoch"}
+        for url, params in [
+            (reverse("task-list"), {"status": TaskStatus.TODO.value}),
+            (reverse("task-board"), {}),
+            (reverse("task-detail", args=[self.task.id]), {}),
+            (reverse("task-search"), {"q": "task"}),
+            (reverse("task-sync"), {}),
+        ]:
+            response = self.client.get(url, {**params, "time_format": "rfc2822"})
+            self.assertEqual((response.status_code, response.json()), (400, expected), url)
+
+
+class TaskConditionalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.older = Task.objects.create(user=self.user, detail="older", priority=1)
+        self.newest = Task.objects.create(user=self.user, detail="newest", priority=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, **headers):
+        # raw times, so that the validators do not change with the current minute
+        return self.client.get(url, {"status": TaskStatus.TODO.value, "time_format": "iso"}, headers=headers)
+
+    def test_list_not_modified(self):
+        url = reverse("task-list")
+        response = self.get(url)
+        self.assertNotIn("Last-Modified", response.headers)
+        self.assertEqual(self.get(url, if_none_match=response["ETag"]).status_code, 304)
+
+        self.newest.delete()
+        response = self.get(url, if_none_match=response["ETag"], if_modified_since=http_date())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task["detail"] for task in response.data["results"]], ["older"])
+
+    def test_list_validation_reads_the_change_sequence(self):
+        for i in range(20):
+            Task.objects.create(user=self.user, detail=f"task {i}", priority=1)
+        url = reverse("task-list")
+        etag = self.get(url)["ETag"]
+        # a primary key lookup of the sequence, not an aggregate over the tasks
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(url, if_none_match=etag).status_code, 304)
+
+        self.older.apply_transition()
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, 200)
+
+    def test_detail_not_modified(self):
+        url = reverse("task-detail", args=[self.older.id])
+        response = self.get(url)
+        self.assertEqual(self.get(url, if_none_match=response["ETag"]).status_code, 304)
+        self.assertEqual(self.get(url, if_modified_since=response["Last-Modified"]).status_code, 304)
+
+        sleep(1)  # Last-Modified has a one second resolution
+        self.assertEqual(self.client.put(url, {"detail": "changed", "priority": 2}).status_code, 200)
+        self.assertEqual(self.get(url, if_none_match=response["ETag"]).status_code, 200)
+        self.assertEqual(self.get(url, if_modified_since=response["Last-Modified"]).status_code, 200)
+
+
+class TaskBulkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.other = User.objects.create_user("other@example.com", "password")
+        self.task = Task.objects.create(user=self.user, detail="moved", priority=1)
+        self.doomed = Task.objects.create(user=self.user, detail="deleted", priority=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, operations):
+        return self.client.post(reverse("task-bulk"), operations, format="json")
+
+    def test_mixed_operations(self):
+        response = self.bulk([
+            {"op": "create", "detail": "new", "priority": 3},
+            {"op": "transition", "id": str(self.task.id)},
+            {"op": "delete", "id": str(self.doomed.id)},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in response.data["results"]], [201, 200, 204])
+        self.assertEqual(response.data["results"][0]["data"]["detail"], "new")
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, TaskStatus.DOING)
+        self.assertEqual(sorted(self.user.tasks.values_list("detail", flat=True)), ["moved", "new"])
+
+    def test_invalid_operations_are_reported_and_skipped(self):
+        response = self.bulk([
+            {"op": "create", "detail": "bad priority", "priority": 9},
+            {"op": "transition"},
+            {"op": "archive", "id": str(self.task.id)},
+            {"op": "delete", "id": "00000000-0000-0000-0000-000000000000"},
+            {"op": "transition", "id": str(self.task.id)},
+        ])
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], [400, 400, 400, 404, 200])
+        self.assertIn("priority", results[0]["errors"])
+        self.assertIn("id", results[1]["errors"])
+        self.assertIn("op", results[2]["errors"])
+        self.assertEqual(self.user.tasks.count(), 2)
+
+    def test_operation_limit(self):
+        operations = [{"op": "transition", "id": str(self.task.id)}] * 500
+        self.assertEqual(self.bulk(operations).status_code, 200)
+        self.assertEqual(self.bulk(operations + operations[:1]).status_code, 400)
+        self.assertEqual(self.bulk({"op": "delete", "id": str(self.task.id)}).status_code, 400)
+
+    def test_tasks_of_other_users_are_not_found(self):
+        theirs = Task.objects.create(user=self.other, detail="theirs", priority=1)
+        response = self.bulk([
+            {"op": "transition", "id": str(theirs.id)},
+            {"op": "delete", "id": str(theirs.id)},
+        ])
+        self.assertEqual([result["status"] for result in response.data["results"]], [404, 404])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.status, TaskStatus.TODO)
+
+
+class TaskSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        Task.objects.create(user=self.user, detail="task", priority=1)
+
+    def test_changes_invalidate_summary(self):
+        self.assertEqual(get_task_summary(self.user.id)[TaskStatus.TODO.value], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, detail="task", priority=1)
+        self.assertEqual(get_task_summary(self.user.id)[TaskStatus.TODO.value], 2)
+
+    def test_summary_counted_before_a_commit_is_not_served(self):
+        def count_then_commit(user_id):
+            rows = list(count_tasks(user_id))
+            # a writer commits between the count and the cache write
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.create(user=self.user, detail="task", priority=1)
+            return rows
+
+        with mock.patch("tasks.cache.count_tasks", count_then_commit):
+            self.assertEqual(get_task_summary(self.user.id)[TaskStatus.TODO.value], 1)
+        self.assertEqual(get_task_summary(self.user.id)[TaskStatus.TODO.value], 2)
+
+
+class AsyncTaskViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        other = User.objects.create_user("other@example.com", "password")
+        self.task = Task.objects.create(user=self.user, detail="mine", priority=1)
+        self.theirs = Task.objects.create(user=other, detail="theirs", priority=2)
+        response = self.client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, content_type="application/json"
+        )
+        self.headers = {"Authorization": f"Bearer {response.json()['access']}"}
+
+    async def request_both(self, name, args=(), method="get", **kwargs):
+        """
+        Responses of the sync view and of its `async-` variant to the same request.
+        """
+        sync_response = await sync_to_async(getattr(self.client, method))(reverse(name, args=args), **kwargs)
+        async_response = await getattr(self.async_client, method)(reverse(f"async-{name}", args=args), **kwargs)
+        return sync_response, async_response
+
+    async def assertParity(self, status_code, name, args=(), **kwargs):
+        sync_response, async_response = await self.request_both(name, args, **kwargs)
+        self.assertEqual((sync_response.status_code, async_response.status_code), (status_code, status_code))
+        if status_code != 405:
+            self.assertEqual(sync_response.json(), async_response.json())
+        return async_response
+
+    async def test_reads(self):
+        params = {"status": TaskStatus.TODO.value, "time_format": "iso"}
+        await self.assertParity(200, "task-list", data=params, headers=self.headers)
+        await self.assertParity(200, "task-board", data={"time_format": "iso"}, headers=self.headers)
+        await self.assertParity(200, "task-summary", headers=self.headers)
+        response = await self.assertParity(
+            200, "task-detail", [self.task.id], data={"time_format": "iso"}, headers=self.headers
+        )
+        self.assertEqual(response.json()["detail"], "mine")
+
+    async def test_errors(self):
+        await self.assertParity(400, "task-list", data={"status": "later"}, headers=self.headers)
+        response = await self.assertParity(
+            400, "task-list", data={"status": TaskStatus.TODO.value, "cursor": "nonsense"}, headers=self.headers
+        )
+        self.assertEqual(response.json(), {"detail": "Invalid cursor"})
+        response = await self.assertParity(401, "task-summary")
+        self.assertIn("WWW-Authenticate", response.headers)
+        await self.assertParity(400, "task-board", data={"time_format": "rfc2822"}, headers=self.headers)
+        await self.assertParity(403, "task-detail", [self.theirs.id], headers=self.headers)
+        await self.assertParity(404, "task-detail", [uuid.uuid4()], headers=self.headers)
+        await self.assertParity(405, "task-summary", method="post", headers=self.headers)
+
+
+    async def test_token_errors(self):
+        for data in [{}, {"email": self.user.email}, {"email": "", "password": ""}, [], "email"]:
+            await self.assertParity(400, "token-obtain", method="post", data=data, content_type="application/json")
+        response = await self.assertParity(
+            400, "token-obtain", method="post", data={"email": self.user.email, "password": "wrong"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"non_field_errors": ["Invalid email address or password."]})
+
+
+class TaskExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.other = User.objects.create_user("other@example.com", "password")
+        Task.objects.create(user=self.user, detail="mine", priority=1)
+        Task.objects.create(user=self.other, detail="theirs", priority=2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_export_is_scoped_to_user(self):
+        lines = self.export("task-export")
+        self.assertEqual([json.loads(line)["detail"] for line in lines], ["mine"])
+        self.assertEqual(self.export("task-export", output="csv")[0], ",".join(EXPORT_FIELDS))
+
+    def test_export_all_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse("task-export-all")).status_code, 403)
+        self.user.is_staff = True
+        self.client.force_authenticate(self.user)
+        self.assertEqual(len(self.export("task-export-all")), 2)
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        response = await sync_to_async(self.client.post)(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, format="json"
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access']}"}
+        response = await self.async_client.get(reverse("task-export"), {"output": "csv"}, headers=headers)
+        self.assertTrue(response.is_async)
+        lines = b"".join([line async for line in response.streaming_content]).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(EXPORT_FIELDS))
+        self.assertEqual([line.split(",")[2] for line in lines[1:]], ["mine"])
+
+
+class TaskImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.staff = User.objects.create_user("staff@example.com", "password", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def upload(self, name, content, **params):
+        return self.client.post(
+            f"{reverse('task-import')}?{urlencode(params)}",
+            {"file": SimpleUploadedFile(name, content.encode())},
+            format="multipart",
+        )
+
+    def test_import_reports_invalid_rows(self):
+        content = (
+            "detail,priority,status,user\n"
+            "valid,3,doing,owner@example.com\n"
+            "bad priority,9,todo,owner@example.com\n"
+            "bad status,1,later,\n"
+        )
+        response = self.upload("tasks.csv", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        errors = {error["line"]: error["errors"] for error in response.data["chunks"][0]["errors"]}
+        self.assertEqual(set(errors[3]), {"priority"})
+        self.assertEqual(set(errors[4]), {"status", "user"})
+        self.assertEqual(self.user.tasks.get().status, TaskStatus.DOING)
+
+    def test_import_ndjson_for_default_user(self):
+        content = "\n".join(json.dumps({"detail": f"task {i}", "priority": 2}) for i in range(10))
+        response = self.upload("tasks.ndjson", content, user=self.user.email)
+        self.assertEqual(response.data["created"], 10)
+        self.assertEqual(self.user.tasks.count(), 10)
+
+    def test_import_reports_malformed_user(self):
+        content = "\n".join([
+            json.dumps({"detail": "list", "priority": 1, "user": ["owner@example.com"]}),
+            json.dumps({"detail": "object", "priority": 1, "user": {"email": "owner@example.com"}}),
+            json.dumps({"detail": "valid", "priority": 1, "user": "owner@example.com"}),
+        ])
+        response = self.upload("tasks.ndjson", content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 2))
+        errors = {error["line"]: error["errors"] for error in response.data["chunks"][0]["errors"]}
+        self.assertEqual((set(errors[1]), set(errors[2])), ({"user"}, {"user"}))
+        self.assertEqual(self.user.tasks.get().detail, "valid")
+
+    def test_import_is_staff_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.upload("tasks.csv", "detail,priority\n").status_code, 403)
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        other = User.objects.create_user("other@example.com", "password")
+        Task.objects.create(user=self.user, detail="Renew the passport", priority=1)
+        Task.objects.create(user=self.user, detail="Book flights", priority=2, status=TaskStatus.DONE)
+        Task.objects.create(user=other, detail="Renew passport photos", priority=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get(reverse("task-search"), params)
+        self.assertEqual(response.status_code, 200)
+        return [task["detail"] for task in response.data["results"]]
+
+    def test_search_is_scoped_to_user(self):
+        self.assertEqual(self.search(q="passport"), ["Renew the passport"])
+        self.assertEqual(self.search(q="flights"), ["Book flights"])
+        self.assertEqual(self.search(q="photos"), [])
+
+    def test_search_requires_query(self):
+        self.assertEqual(self.client.get(reverse("task-search")).status_code, 400)
+
+
+class TaskTransitionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.task = Task.objects.create(user=self.user, detail="task", priority=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_transition_is_one_conditional_update(self):
+        # the task, then the owner's next change sequence number and the update, which
+        # PostgreSQL runs as a single statement
+        with self.assertNumQueries(2 if connection.vendor == "postgresql" else 3):
+            response = self.client.patch(reverse("task-detail", args=[self.task.id]))
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, TaskStatus.DOING)
+
+    def test_concurrent_transitions_conflict(self):
+        first, second = Task.objects.get(), Task.objects.get()
+        self.assertEqual(first.apply_transition(), (True, "Task has been moved to `doing`"))
+        with self.assertRaises(TransitionConflict):
+            second.apply_transition()
+        self.assertEqual(Task.objects.get().status, TaskStatus.DOING)
+
+    def test_update_does_not_revert_concurrent_transition(self):
+        stale = Task.objects.get()
+        Task.objects.get().apply_transition()
+        serializer = TaskUpdateSerializer(stale, data={"detail": "edited", "priority": 2})
+        self.assertTrue(serializer.is_valid())
+        with mock.patch("tasks.events.get_broker") as get_broker, self.captureOnCommitCallbacks(execute=True):
+            serializer.save()
+        task = Task.objects.get()
+        self.assertEqual((task.detail, task.status), ("edited", TaskStatus.DOING))
+        # the event does not announce the status the task was read with
+        _, event = get_broker().publish.call_args.args
+        self.assertEqual(set(event["data"]), {"id", "detail", "priority", "updated_at"})
+
+
+class TaskEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.other = User.objects.create_user("other@example.com", "password")
+        response = self.client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, content_type="application/json"
+        )
+        self.headers = {"Authorization": f"Bearer {response.json()['access']}"}
+
+    def change_tasks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.other, detail="not mine", priority=1)
+            task = Task.objects.create(user=self.user, detail="task", priority=1)
+            task.apply_transition()
+            task.delete()
+
+    async def test_stream_delivers_committed_changes(self):
+        response = await self.async_client.get(reverse("task-events"), headers=self.headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b": connected\n\n")
+
+        await sync_to_async(self.change_tasks)()
+        events = [(await anext(stream)).decode().split("\n") for _ in range(3)]
+        self.assertEqual([event[0] for event in events], ["event: created", "event: transitioned", "event: deleted"])
+        self.assertEqual(json.loads(events[1][1].removeprefix("data: "))["previous_status"], TaskStatus.TODO.value)
+
+        # a client disconnecting cancels the task reading the stream
+        reading = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+        self.assertEqual(get_broker().subscriptions, {})
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get(reverse("task-events"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_not_served_under_wsgi(self):
+        response = self.client.get(reverse("task-events"), headers=self.headers)
+        self.assertEqual(response.status_code, 501)
+
+
+class TaskSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+        self.tasks = [Task.objects.create(user=self.user, detail=f"task {i}", priority=1) for i in range(5)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        response = self.client.get(reverse("task-sync"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def sync_all(self, cursor=None):
+        tasks, deleted = [], []
+        while True:
+            page = self.sync(cursor, limit=2)
+            tasks += [task["id"] for task in page["tasks"]]
+            deleted += page["deleted"]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                return tasks, deleted, cursor
+
+    def test_sync_returns_only_changes_since_cursor(self):
+        tasks, deleted, cursor = self.sync_all()
+        self.assertEqual(sorted(tasks), sorted(str(task.id) for task in self.tasks))
+        self.assertEqual(self.sync(cursor), {"cursor": cursor, "has_more": False, "tasks": [], "deleted": []})
+
+        self.tasks[0].apply_transition()
+        self.tasks[1].detail = "edited"
+        self.tasks[1].save()
+        self.client.delete(reverse("task-detail", args=[self.tasks[2].id]))
+        self.client.post(reverse("task-bulk"), [{"op": "create", "detail": "new", "priority": 2}], format="json")
+        new = Task.objects.get(detail="new")
+
+        tasks, deleted, cursor = self.sync_all(cursor)
+        self.assertEqual(tasks, [str(self.tasks[0].id), str(self.tasks[1].id), str(new.id)])
+        self.assertEqual(deleted, [str(self.tasks[2].id)])
+        self.assertEqual(self.sync_all(cursor), ([], [], cursor))
+
+    def test_compacted_cursor_expires(self):
+        cursor = self.sync()["cursor"]
+        self.tasks[0].delete()
+        self.assertEqual(compact_tombstones(now() + timedelta(seconds=1)), 1)
+        self.assertFalse(TaskTombstone.objects.exists())
+
+        response = self.client.get(reverse("task-sync"), {"cursor": cursor})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(len(self.sync()["tasks"]), 4)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("task-sync"), {"cursor": "nonsense"})
+        self.assertEqual((response.status_code, response.data), (400, {"detail": "Invalid cursor"}))
+
+
+class TaskStatusFieldTests(SimpleTestCase):
+    def setUp(self):
+        self.field = TaskStatusField()
+
+    def test_round_trip(self):
+        for task_status, code in [(TaskStatus.TODO, 1), (TaskStatus.DOING, 2), (TaskStatus.DONE, 3), (TaskStatus.ON_HOLD, 4)]:
+            self.assertEqual(self.field.get_prep_value(task_status), code)
+            self.assertEqual(self.field.get_prep_value(task_status.value), code)
+            self.assertIs(self.field.from_db_value(code, None, None), task_status)
+        self.assertIsNone(self.field.get_prep_value(None))
+        self.assertIsNone(self.field.from_db_value(None, None, None))
+
+    def test_unknown_values(self):
+        for value in [0, 5, "blocked"]:
+            with self.assertRaises(ValidationError):
+                self.field.get_prep_value(value)
+            with self.assertRaises(ValidationError):
+                self.field.from_db_value(value, None, None)
+
+class TaskMigrationTests(TransactionTestCase):
+    def migrate(self, *targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(list(targets))
+        return executor.loader.project_state(list(targets)).apps
+
+    def tearDown(self):
+        self.migrate(*MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_status_codes_migrate_both_ways(self):
+        apps = self.migrate(("tasks", "0003_task_updated_at"))
+        user = apps.get_model("users", "User").objects.create(email="owner@example.com")
+        for task_status in TaskStatus:
+            apps.get_model("tasks", "Task").objects.create(
+                user_id=user.id, detail=task_status.value, priority=1, status=task_status
+            )
+
+        def stored_statuses():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT detail, status FROM tasks_task")
+                return dict(cursor.fetchall())
+
+        self.migrate(("tasks", "0004_task_status_smallint"))
+        self.assertEqual(stored_statuses(), {"todo": 1, "doing": 2, "done": 3, "on hold": 4})
+        self.migrate(("tasks", "0003_task_updated_at"))
+        self.assertEqual(stored_statuses(), {value: value for value in ["todo", "doing", "done", "on hold"]})
+
+    def test_search_index_migrates_back(self):
+        # table rebuilds create the index from the migration state, whatever the database
+        self.migrate(("tasks", "0003_task_updated_at"))
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "tasks_task")
+        self.assertNotIn("task_search_vector_idx", constraints)
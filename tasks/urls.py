@@ -5,5 +5,19 @@ from . import views
 
 urlpatterns = [
     path('', views.TaskList.as_view(), name='task-list'),
+    path('board/', views.TaskBoard.as_view(), name='task-board'),
+    path('summary/', views.TaskSummary.as_view(), name='task-summary'),
+    path('bulk/', views.TaskBulk.as_view(), name='task-bulk'),
+    path('search/', views.TaskSearch.as_view(), name='task-search'),
+    path('sync/', views.TaskSync.as_view(), name='task-sync'),
+    path('export/', views.TaskExport.as_view(), name='task-export'),
+    path('export/all/', views.TaskExportAll.as_view(), name='task-export-all'),
+    path('events/', views.TaskEvents.as_view(), name='task-events'),
+    path('import/', views.TaskImport.as_view(), name='task-import'),
     path('<uuid:pk>/', views.TaskDetail.as_view(), name='task-detail'),
+    # async (ASGI) variants of the read endpoints
+    path('async/', views.AsyncTaskList.as_view(), name='async-task-list'),
+    path('async/board/', views.AsyncTaskBoard.as_view(), name='async-task-board'),
+    path('async/summary/', views.AsyncTaskSummary.as_view(), name='async-task-summary'),
+    path('async/<uuid:pk>/', views.AsyncTaskDetail.as_view(), name='async-task-detail'),
 ]
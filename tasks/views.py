@@ -1,17 +1,128 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.timezone import now
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api.permissions import IsOwner
-from tasks.models import TaskStatus, Task
-from tasks.serializers import TaskCreateSerializer, TaskSerializer, TaskUpdateSerializer
+from api.permissions import IsOwner, IsStaff
+from api.views import AsyncAPIView
+from tasks.cache import aget_task_summary, get_task_summary, invalidate_task_summary
+from tasks.conditional import (
+    aconditional_response, conditional_response, task_detail_validators, task_list_etag
+)
+from tasks.events import CREATED, TRANSITIONED, event_stream, publish_task_event
+from tasks.export import EXPORT_FORMATS, aexport_lines, export_lines
+from tasks.imports import IMPORT_FORMATS, import_tasks, read_rows
+from tasks.models import TaskStatus, Task, TaskSyncState, TransitionConflict, next_change_sequence
+from tasks.pagination import TaskCursorPagination, TaskSearchPagination
+from tasks.search import search_tasks
+from tasks.sync import ExpiredCursor, InvalidCursor, decode_cursor, encode_cursor, get_changes
+from tasks.serializers import (
+    HUMANIZED, TIME_FORMATS, TaskBulkOperationSerializer, TaskCreateSerializer, TaskRowSerializer, TaskSerializer,
+    TaskUpdateSerializer
+)
+
+User = get_user_model()
+
+
+TIME_FORMAT_PARAMETER = OpenApiParameter(
+    name="time_format",
+    type=OpenApiTypes.STR,
+    enum=TIME_FORMATS,
+    required=False,
+    description="`humanized` (default) returns `humanized_time`, `iso` and `epoch` return the raw `created_at`"
+)
+
+
+class TimeFormatMixin:
+    """
+    Parses the `time_format` query parameter, see `TIME_FORMATS`.
+    """
+
+    def get_time_format(self, request):
+        time_format = request.query_params.get('time_format', HUMANIZED)
+        if time_format not in TIME_FORMATS:
+            raise ParseError(f"Invalid time_format, expected one of: {', '.join(TIME_FORMATS)}")
+        return time_format
+
+
+class TaskListMixin(TimeFormatMixin):
+    """
+    Shared by the sync and async task list views.
+    """
+
+    pagination_class = TaskCursorPagination
+
+    def get_task_status(self, request):
+        status_str = request.query_params.get('status', None)
+        if not status_str in [s.value for s in TaskStatus]:
+            return None
+        return TaskStatus(value=status_str)
+
+    def get_change_sequence(self, request):
+        """
+        The last number of the user's task change sequence, which every task write
+        advances: a single primary key lookup however many tasks the user has.
+        """
+        return TaskSyncState.objects.filter(user=request.user).values_list('sequence', flat=True)
+
+
+class TaskBoardMixin(TimeFormatMixin):
+    """
+    Shared by the sync and async board views.
+    """
+
+    default_limit = 20
+    max_limit = 100
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get_queryset(self, request):
+        """
+        The top `limit` tasks of every status column, annotated with the total size
+        of their column.
+        """
+        limit = self.get_limit(request)
+        ordering = [F(field[1:]).desc() if field.startswith('-') else F(field).asc() for field in Task._meta.ordering]
+        return (
+            request.user.tasks.annotate(
+                column_rank=Window(RowNumber(), partition_by=[F('status')], order_by=ordering + [F('id').asc()]),
+                column_count=Window(Count('id'), partition_by=[F('status')]),
+            )
+            .filter(column_rank__lte=limit)
+            .order_by('status', 'column_rank')
+            .values(*TaskRowSerializer.fields, 'column_count')
+        )
+
+    def build_board(self, request, rows, time_format):
+        board = {s.value: {"count": 0, "results": []} for s in TaskStatus}
+        serializer = TaskRowSerializer(request.user, time_format)
+        for row in rows:
+            column = board[row["status"].value]
+            column["count"] = row["column_count"]
+            column["results"].append(serializer.to_representation(row))
+        return board
 
 
-class TaskList(APIView):
+class TaskList(TaskListMixin, APIView):
     """
     Endpoint to handle both fetching all tasks and creating a new task.
     """
@@ -32,19 +143,38 @@ class TaskList(APIView):
                 required=True,
                 description="Filter tasks by their status"
             ),
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                required=False,
+                description="Opaque cursor taken from the `next` link of the previous page"
+            ),
+            OpenApiParameter(
+                name="page_size",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Number of tasks per page (default 50, max 200)"
+            ),
+            TIME_FORMAT_PARAMETER,
         ]
     )
     def get(self, request):
         """
-        Handle GET request to fetch tasks.
+        Handle GET request to fetch a page of tasks.
         """
-        status_str = request.query_params.get('status', None)
-        if not status_str in [s.value for s in TaskStatus]:
+        task_status = self.get_task_status(request)
+        if task_status is None:
             return Response({"detail": "Invalid task status was parsed"}, status=status.HTTP_400_BAD_REQUEST)
-        task_status = TaskStatus(value=status_str)
         tasks = request.user.tasks.all().filter(status=task_status)
-        serializer = self.get_serializer_class()(tasks, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        time_format = self.get_time_format(request)
+        etag = task_list_etag(request, task_status, self.get_change_sequence(request).first() or 0, time_format)
+
+        def get_response():
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(tasks.values(*TaskRowSerializer.fields), request, view=self)
+            return paginator.get_paginated_response(TaskRowSerializer(request.user, time_format).serialize(page))
+
+        return conditional_response(request, etag, None, get_response)
 
     def post(self, request):
         """
@@ -57,7 +187,367 @@ class TaskList(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskDetail(APIView):
+class TaskBoard(TaskBoardMixin, APIView):
+    """
+    Fetch every kanban column in a single round trip.
+    """
+
+    allowed_methods = ['GET']
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Maximum number of tasks returned per column (default 20, max 100)"
+            ),
+            TIME_FORMAT_PARAMETER,
+        ]
+    )
+    def get(self, request):
+        """
+        Get the top tasks and the total task count of each status column.
+        """
+        time_format = self.get_time_format(request)
+        return Response(self.build_board(request, self.get_queryset(request), time_format), status=status.HTTP_200_OK)
+
+
+class TaskSummary(APIView):
+    """
+    Number of tasks in each status, for dashboards that poll frequently.
+    """
+
+    allowed_methods = ['GET']
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Get the current user's task count per status.
+        """
+        return Response(get_task_summary(request.user.id), status=status.HTTP_200_OK)
+
+
+class TaskBulk(APIView):
+    """
+    Apply a batch of create, transition and delete operations in one transaction.
+    """
+
+    allowed_methods = ['POST']
+    permission_classes = [IsAuthenticated]
+    max_operations = 500
+
+    def get_serializer_class(self):
+        return TaskBulkOperationSerializer
+
+    def parse_operation(self, request, item):
+        """
+        Validate a single operation. Creates also carry the `detail` and `priority`
+        of the new task, which are validated like a regular task creation.
+        """
+        serializer = self.get_serializer_class()(data=item)
+        if not serializer.is_valid():
+            return None, {"status": status.HTTP_400_BAD_REQUEST, "errors": serializer.errors}
+        operation = serializer.validated_data
+        if operation["op"] == "create":
+            create_serializer = TaskCreateSerializer(data=item)
+            if not create_serializer.is_valid():
+                return None, {"status": status.HTTP_400_BAD_REQUEST, "errors": create_serializer.errors}
+            operation["task"] = Task(user=request.user, **create_serializer.validated_data)
+        return operation, None
+
+    @extend_schema(request=TaskBulkOperationSerializer(many=True))
+    def post(self, request):
+        """
+        Run a list of operations and report the outcome of each one, in request order.
+        Invalid operations are reported and skipped, the rest are applied together.
+        """
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of operations"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_operations:
+            return Response(
+                {"detail": f"At most {self.max_operations} operations can be sent at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        operations, results = [], []
+        for item in request.data:
+            operation, error = self.parse_operation(request, item)
+            operations.append(operation)
+            results.append(error)
+
+        created, moved, deleted, previous_statuses = [], {}, [], {}
+        with transaction.atomic():
+            # reserve a change sequence number per operation before locking any task
+            change_seq = next_change_sequence(request.user.id, count=len(operations)) - len(operations)
+            ids = {operation["id"] for operation in operations if operation and operation["op"] != "create"}
+            tasks = request.user.tasks.select_for_update().in_bulk(ids)
+            for index, operation in enumerate(operations):
+                if operation is None:
+                    continue
+                if operation["op"] == "create":
+                    created.append((index, operation["task"]))
+                    continue
+                task = tasks.get(operation["id"])
+                if task is None:
+                    results[index] = {"status": status.HTTP_404_NOT_FOUND, "detail": "Task not found"}
+                elif operation["op"] == "delete":
+                    del tasks[task.id]
+                    moved.pop(task.id, None)
+                    deleted.append(task.id)
+                    results[index] = {"status": status.HTTP_204_NO_CONTENT, "detail": "Task deleted successfully"}
+                else:
+                    previous_statuses.setdefault(task.id, task.status)
+                    was_moved, detail = task.transition(on_hold=operation["on_hold"])
+                    if was_moved:
+                        moved[task.id] = task
+                    results[index] = {"status": status.HTTP_200_OK, "detail": detail}
+
+            updated_at = now()
+            for task in [task for _, task in created] + list(moved.values()):
+                change_seq += 1
+                task.change_seq = change_seq
+                task.updated_at = updated_at
+            Task.objects.bulk_create([task for _, task in created])
+            Task.objects.bulk_update(moved.values(), ["status", "updated_at", "change_seq"])
+            Task.objects.filter(id__in=deleted).delete()
+            # bulk_create and bulk_update do not send the signals that keep the summary fresh
+            # and feed the change stream
+            if created or moved:
+                invalidate_task_summary(request.user.id)
+            for _, task in created:
+                publish_task_event(CREATED, task)
+            for task in moved.values():
+                if task.status != previous_statuses[task.id]:
+                    publish_task_event(TRANSITIONED, task, previous_status=previous_statuses[task.id].value)
+
+        for index, task in created:
+            results[index] = {"status": status.HTTP_201_CREATED, "data": TaskSerializer(task).data}
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class TaskSearch(TimeFormatMixin, APIView):
+    """
+    Full-text search over the current user's tasks.
+    """
+
+    allowed_methods = ['GET']
+    permission_classes = [IsAuthenticated]
+    pagination_class = TaskSearchPagination
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=OpenApiTypes.STR,
+                required=True,
+                description="Words to look for in the task details"
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Number of results per page (default 20, max 100)"
+            ),
+            OpenApiParameter(
+                name="offset",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Index of the first result to return"
+            ),
+            TIME_FORMAT_PARAMETER,
+        ]
+    )
+    def get(self, request):
+        """
+        Search tasks of every status, best matches first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"detail": "A search query is required"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = TaskRowSerializer(request.user, self.get_time_format(request))
+        tasks = search_tasks(request.user.tasks.all(), query)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(tasks.values(*TaskRowSerializer.fields), request, view=self)
+        return paginator.get_paginated_response(serializer.serialize(page))
+
+
+class TaskSync(TimeFormatMixin, APIView):
+    """
+    Changes to the current user's tasks since a cursor, for clients keeping a local
+    copy of their tasks.
+    """
+
+    allowed_methods = ['GET']
+    permission_classes = [IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params["limit"])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(limit, self.max_limit) if limit > 0 else self.default_limit
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                required=False,
+                description="`cursor` of the previous response, omitted to download every task"
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Maximum number of changes returned (default 500, max 1000)"
+            ),
+            TIME_FORMAT_PARAMETER,
+        ]
+    )
+    def get(self, request):
+        """
+        Tasks created or modified and ids of tasks deleted since `cursor`. Repeat with
+        the returned `cursor` while `has_more` is true, and keep the last one for the
+        next sync. A 410 means the cursor is too old and the client must sync from
+        scratch.
+        """
+        serializer = TaskRowSerializer(request.user, self.get_time_format(request))
+        position = None
+        if request.query_params.get("cursor"):
+            try:
+                position = decode_cursor(request.query_params["cursor"])
+            except InvalidCursor as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows, deleted, position, has_more = get_changes(request.user, position, self.get_limit(request))
+        except ExpiredCursor as e:
+            return Response({"detail": str(e)}, status=status.HTTP_410_GONE)
+        return Response({
+            "cursor": encode_cursor(position),
+            "has_more": has_more,
+            "tasks": serializer.serialize(rows),
+            "deleted": deleted,
+        })
+
+
+class TaskExport(APIView):
+    """
+    Stream the complete task history of the current user as NDJSON or CSV.
+    """
+
+    allowed_methods = ['GET']
+    permission_classes = [IsAuthenticated]
+    default_output = 'ndjson'
+
+    def get_queryset(self, request):
+        return request.user.tasks.all()
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="output",
+                type=OpenApiTypes.STR,
+                enum=list(EXPORT_FORMATS),
+                required=False,
+                description="Export format, `ndjson` (default) or `csv`"
+            ),
+        ],
+        responses={(200, media_type): OpenApiTypes.BINARY for media_type in EXPORT_FORMATS.values()},
+    )
+    def get(self, request):
+        """
+        Export every task, oldest first, one record per line. Rows are read and
+        written in chunks, so the export size is not bounded by memory.
+        """
+        export_format = request.query_params.get('output', self.default_output)
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": "Invalid export format was parsed"}, status=status.HTTP_400_BAD_REQUEST)
+        # each server streams its own kind of iterator, and buffers the other one entirely
+        lines = aexport_lines if isinstance(request._request, ASGIRequest) else export_lines
+        response = StreamingHttpResponse(
+            lines(self.get_queryset(request), export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+
+class TaskExportAll(TaskExport):
+    """
+    Stream the tasks of every user, for staff.
+    """
+
+    permission_classes = [IsStaff]
+
+    def get_queryset(self, request):
+        return Task.objects.all()
+
+
+class TaskImport(APIView):
+    """
+    Load tasks migrated from other tools, for staff.
+    """
+
+    allowed_methods = ['POST']
+    permission_classes = [IsStaff]
+    parser_classes = [MultiPartParser]
+    chunk_size = 5000
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="input",
+                type=OpenApiTypes.STR,
+                enum=IMPORT_FORMATS,
+                required=False,
+                description="Format of the file, guessed from its extension by default"
+            ),
+            OpenApiParameter(
+                name="user",
+                type=OpenApiTypes.EMAIL,
+                required=False,
+                description="Owner of the rows that do not name a `user`"
+            ),
+        ],
+        request={
+            "multipart/form-data": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}}
+        },
+    )
+    def post(self, request):
+        """
+        Import a CSV or NDJSON file of tasks (`detail`, `priority`, optional `status`
+        and owner `user` email). Rows are validated and inserted in chunks, and the
+        errors of each chunk are reported by line.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "No file was uploaded"}, status=status.HTTP_400_BAD_REQUEST)
+        import_format = request.query_params.get('input', upload.name.rsplit('.', 1)[-1].lower())
+        if import_format not in IMPORT_FORMATS:
+            return Response({"detail": "Invalid import format was parsed"}, status=status.HTTP_400_BAD_REQUEST)
+
+        default_user = None
+        if request.query_params.get('user'):
+            default_user = User.objects.filter(email=request.query_params['user']).first()
+            if default_user is None:
+                return Response({"detail": "User not found"}, status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        chunks = list(import_tasks(read_rows(stream, import_format), default_user, self.chunk_size))
+        return Response(
+            {
+                "created": sum(chunk["created"] for chunk in chunks),
+                "failed": sum(chunk["rows"] - chunk["created"] for chunk in chunks),
+                "chunks": chunks,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class TaskDetail(TimeFormatMixin, APIView):
     """
     Retrieve, update, or delete a task instance.
     """
@@ -73,17 +563,24 @@ class TaskDetail(APIView):
         return None
 
     def get_object(self, pk):
-        obj = get_object_or_404(Task, pk=pk)
+        obj = get_object_or_404(Task.objects.select_related('user'), pk=pk)
         self.check_object_permissions(self.request, obj)
         return obj
 
+    @extend_schema(parameters=[TIME_FORMAT_PARAMETER])
     def get(self, request, pk):
         """
         Retrieve task details.
         """
         task = self.get_object(pk)
-        serializer = self.get_serializer_class()(task)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        time_format = self.get_time_format(request)
+        etag, last_modified = task_detail_validators(task, time_format)
+
+        def get_response():
+            serializer = self.get_serializer_class()(task, context={"time_format": time_format})
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        return conditional_response(request, etag, last_modified, get_response)
 
     def put(self, request, pk):
         """
@@ -107,28 +604,18 @@ class TaskDetail(APIView):
         ]
     )
     def patch(self, request, pk):
-        task = self.get_object(pk)
-        on_hold = request.query_params.get("to-onhold", None)
-        if on_hold and str(on_hold).lower() in ['true', '1', 'yes']:
-            if task.status in [TaskStatus.DONE, TaskStatus.ON_HOLD]:
-                return Response({"detail": f"Task is already {task.status.value}"})
-            else:
-                task.status = TaskStatus.ON_HOLD
-                task.save()
-                return Response({"detail": "Task has been put on-hold"})
-        if task.status == TaskStatus.TODO:
-            task.status = TaskStatus.DOING
-        elif task.status == TaskStatus.DOING:
-            task.status = TaskStatus.DONE
-        else:
-            return Response(
-                {
-                    "detail": f"Task is {'already ' if task.status == TaskStatus.DONE else ''}{task.status.value}"
-                },
-                status=status.HTTP_200_OK
-            )
-        task.save()
-        return Response({"detail": f"Task has been moved to `{task.status.value}`"}, status=status.HTTP_200_OK)
+        """
+        Move a task to its next status. Two concurrent transitions of the same task
+        cannot both apply, the second one gets a 409.
+        """
+        task = get_object_or_404(Task.objects.only('id', 'user_id', 'status'), pk=pk)
+        self.check_object_permissions(request, task)
+        on_hold = str(request.query_params.get("to-onhold", "")).lower() in ['true', '1', 'yes']
+        try:
+            _, detail = task.apply_transition(on_hold=on_hold)
+        except TransitionConflict as e:
+            return Response({"detail": str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response({"detail": detail}, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
         """
@@ -137,3 +624,100 @@ class TaskDetail(APIView):
         task = self.get_object(pk)
         task.delete()
         return Response({"detail": "Task deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncTaskList(TaskListMixin, AsyncAPIView):
+    """
+    Async variant of `TaskList` reads, using the async ORM under ASGI.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        task_status = self.get_task_status(request)
+        if task_status is None:
+            return self.render({"detail": "Invalid task status was parsed"}, status=status.HTTP_400_BAD_REQUEST)
+        tasks = request.user.tasks.all().filter(status=task_status)
+        time_format = self.get_time_format(request)
+        etag = task_list_etag(
+            request, task_status, await self.get_change_sequence(request).afirst() or 0, time_format
+        )
+
+        async def get_response():
+            paginator = self.pagination_class()
+            page = await paginator.apaginate_queryset(tasks.values(*TaskRowSerializer.fields), request, view=self)
+            data = TaskRowSerializer(request.user, time_format).serialize(page)
+            return self.render(paginator.get_paginated_data(data))
+
+        return await aconditional_response(request, etag, None, get_response)
+
+
+class AsyncTaskBoard(TaskBoardMixin, AsyncAPIView):
+    """
+    Async variant of `TaskBoard`.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        time_format = self.get_time_format(request)
+        rows = [row async for row in self.get_queryset(request)]
+        return self.render(self.build_board(request, rows, time_format))
+
+
+class AsyncTaskSummary(AsyncAPIView):
+    """
+    Async variant of `TaskSummary`.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        return self.render(await aget_task_summary(request.user.id))
+
+
+class AsyncTaskDetail(TimeFormatMixin, AsyncAPIView):
+    """
+    Async variant of `TaskDetail` reads.
+    """
+
+    permission_classes = [IsAuthenticated, IsOwner]
+
+    async def get(self, request, pk):
+        try:
+            task = await Task.objects.select_related('user').aget(pk=pk)
+        except Task.DoesNotExist:
+            raise Http404("No Task matches the given query.")
+        await self.check_object_permissions(request, task)
+        time_format = self.get_time_format(request)
+        etag, last_modified = task_detail_validators(task, time_format)
+
+        async def get_response():
+            return self.render(TaskSerializer(task, context={"time_format": time_format}).data)
+
+        return await aconditional_response(request, etag, last_modified, get_response)
+
+
+class TaskEvents(AsyncAPIView):
+    """
+    Server-sent events stream of changes to the current user's tasks. Served under
+    ASGI, where an idle stream holds no thread.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    async def get(self, request):
+        """
+        Stream `created`, `updated`, `transitioned` and `deleted` events as they are
+        committed. A `resync` event means events were dropped and the client should
+        reload its tasks.
+        """
+        if not isinstance(request._request, ASGIRequest):
+            # a WSGI server would hold a worker for as long as the stream stays open
+            return self.render(
+                {"detail": "Event streams are only served under ASGI"}, status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        response = StreamingHttpResponse(event_stream(request.user.id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -0,0 +1,26 @@
+from django.contrib.auth import backends, get_user_model
+
+from users.hashers import amake_password
+
+User = get_user_model()
+
+
+class ModelBackend(backends.ModelBackend):
+    """
+    `ModelBackend` whose async authentication never hashes on the event loop.
+    """
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash once anyway, so that unknown users take as long as known ones
+            await amake_password(password)
+        else:
+            if await user.acheck_password(password) and self.user_can_authenticate(user):
+                return user
+        return None
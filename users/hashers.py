@@ -0,0 +1,69 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+    Scrypt with the cost parameters of the `SCRYPT_*` settings. Hashes made with
+    other parameters are upgraded on the user's next login.
+    """
+
+    @property
+    def work_factor(self):
+        return settings.SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.SCRYPT_PARALLELISM
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters of the `ARGON2_*` settings. Requires the
+    `argon2-cffi` package.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS, thread_name_prefix="password-hashing"
+        )
+    return _executor
+
+
+async def run_hasher(func, *args, **kwargs):
+    """
+    Run a CPU-bound hashing function in the bounded hashing pool instead of on the
+    event loop. The hashing algorithms release the GIL, so concurrent logins are
+    spread over the pool's threads while the loop keeps serving other requests.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+async def amake_password(password):
+    return await run_hasher(hashers.make_password, password)
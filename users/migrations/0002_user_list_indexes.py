@@ -0,0 +1,28 @@
+import django.db.models.functions.text
+import users.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='user_created_at_id_idx'),
+        ),
+        # The operator class is PostgreSQL only, other databases index the bare expression
+        *[
+            migrations.AddIndex(
+                model_name='user',
+                index=models.Index(
+                    users.models.PatternOpClass(django.db.models.functions.text.Upper(field)),
+                    name=f'user_{field}_prefix_idx',
+                ),
+            )
+            for field in ['email', 'first_name', 'last_name']
+        ],
+    ]
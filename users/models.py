@@ -1,8 +1,29 @@
+from django.contrib.auth.hashers import check_password, verify_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
+
+from users.hashers import run_hasher
 from uuid import uuid4
 
 
+class PatternOpClass(OpClass):
+    """
+    The `text_pattern_ops` operator class on PostgreSQL. Other databases have no
+    operator classes and index the bare expression, so that the index can be built
+    from the model on every database.
+    """
+
+    def __init__(self, expression):
+        super().__init__(expression, name="text_pattern_ops")
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor != "postgresql":
+            return compiler.compile(self.get_source_expressions()[0])
+        return super().as_sql(compiler, connection, **extra_context)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -37,6 +58,60 @@ class User(AbstractBaseUser):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="user_created_at_id_idx"),
+            # `istartswith` compiles to `UPPER(field) LIKE UPPER('prefix%')`, which can
+            # only use an index built with the pattern operator class on PostgreSQL
+            *[
+                models.Index(PatternOpClass(Upper(field)), name=f"user_{field}_prefix_idx")
+                for field in ["email", "first_name", "last_name"]
+            ],
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}".strip()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the loaded values, so that saving can tell which fields changed.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def field_changed(self, name):
+        """
+        Whether the field was assigned a value other than the one it was loaded with.
+        Fields of instances that were not loaded from the database count as changed.
+        """
+        if name not in self.__dict__:  # deferred and never assigned
+            return False
+        loaded = getattr(self, "_loaded_values", {})
+        return name not in loaded or loaded[name] != self.__dict__[name]
+
+    def check_password(self, raw_password):
+        """
+        Like `AbstractBaseUser.check_password`, but a hash upgraded to the preferred
+        hasher is stored without sending `post_save`: the password itself did not
+        change, so the user's tokens must not be revoked.
+        """
+        return check_password(raw_password, self.password, self.upgrade_password)
+
+    async def acheck_password(self, raw_password):
+        """
+        Async variant of `check_password`, hashing in the bounded hashing pool.
+        """
+        is_correct, must_update = await run_hasher(verify_password, raw_password, self.password)
+        if is_correct and must_update:
+            await run_hasher(self.set_password, raw_password)
+            self._password = None
+            await type(self)._default_manager.filter(pk=self.pk).aupdate(password=self.password)
+            self._loaded_values = {**getattr(self, "_loaded_values", {}), "password": self.password}
+        return is_correct
+
+    def upgrade_password(self, raw_password):
+        self.set_password(raw_password)
+        self._password = None
+        type(self)._default_manager.filter(pk=self.pk).update(password=self.password)
+        self._loaded_values = {**getattr(self, "_loaded_values", {}), "password": self.password}
@@ -0,0 +1,10 @@
+from api.pagination import KeysetPagination
+
+
+class UserCursorPagination(KeysetPagination):
+    """
+    Keyset pagination over users in sign-up order, backed by the
+    `user_created_at_id_idx` index.
+    """
+
+    ordering = ("created_at", "id")
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
+from django.utils.timezone import get_current_timezone
 from rest_framework import serializers
 
+from api.serializers import RowSerializer, isoformat
+
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
@@ -10,6 +13,32 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "email", "first_name", "last_name", "is_active", "is_staff", "created_at"]
 
 
+class UserRowSerializer(RowSerializer):
+    """
+    Fast-path equivalent of `UserSerializer`, optionally with the `task_count`
+    annotation of the rows.
+    """
+    fields = UserSerializer.Meta.fields
+
+    def __init__(self, with_task_count=False):
+        self.timezone = get_current_timezone()
+        self.with_task_count = with_task_count
+
+    def to_representation(self, row):
+        data = {
+            "id": str(row["id"]),
+            "email": row["email"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "is_active": row["is_active"],
+            "is_staff": row["is_staff"],
+            "created_at": isoformat(row["created_at"], self.timezone),
+        }
+        if self.with_task_count:
+            data["task_count"] = row["task_count"]
+        return data
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import USER_CLAIMS, revoke_tokens
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Access tokens carry the user's claims, so a change to one of them, or to the
+    password, invalidates the tokens issued so far. Saves that leave them alone,
+    like a profile update, keep the user logged in.
+    """
+    fields = {*USER_CLAIMS, "password"}
+    if update_fields is not None:
+        fields &= set(update_fields)
+    changed = [name for name in fields if instance.field_changed(name)]
+    if not created and changed:
+        revoke_tokens(instance.id)
+    # the saved values are what the next save compares against
+    instance._loaded_values = {
+        **getattr(instance, "_loaded_values", {}),
+        **{name: instance.__dict__[name] for name in fields if name in instance.__dict__},
+    }
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    revoke_tokens(instance.id)
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from api.authentication import REVOKED_CACHE_KEY
+from tasks.models import Task
+from users.models import User
+
+
+class UserListTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_staff_user("staff@example.com", "password", first_name="Sam")
+        for i in range(5):
+            user = User.objects.create_user(f"user{i}@example.com", "password", first_name=f"Ann{i}")
+            Task.objects.bulk_create(Task(user=user, detail="task", priority=1) for _ in range(i))
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_pages_through_users_with_task_counts(self):
+        url, users = f"{reverse('user-list')}?page_size=2&task_count=true", []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            users += response.data["results"]
+            url = response.data["next"]
+        self.assertEqual([user["email"] for user in users], list(User.objects.values_list("email", flat=True)))
+        self.assertEqual([user["task_count"] for user in users], [0, 0, 1, 2, 3, 4])
+
+    def test_prefix_search(self):
+        response = self.client.get(reverse("user-list"), {"search": "ann3"})
+        self.assertEqual([user["email"] for user in response.data["results"]], ["user3@example.com"])
+        response = self.client.get(reverse("user-list"), {"search": "STAFF@"})
+        self.assertEqual([user["email"] for user in response.data["results"]], ["staff@example.com"])
+
+
+class PasswordRehashTests(TestCase):
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def setUp(self):
+        self.user = User.objects.create_user("owner@example.com", "password")
+
+    @override_settings(
+        PASSWORD_HASHERS=["users.hashers.ScryptPasswordHasher", "django.contrib.auth.hashers.MD5PasswordHasher"],
+        SCRYPT_PARALLELISM=1,
+        STATELESS_AUTHENTICATION=True,
+    )
+    def test_login_upgrades_hash_without_revoking_tokens(self):
+        response = self.client.post(
+            reverse("token-obtain"), {"email": self.user.email, "password": "password"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+        self.assertIsNone(cache.get(REVOKED_CACHE_KEY.format(self.user.id)))
+
+
+@override_settings(STATELESS_AUTHENTICATION=True)
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_staff_user("staff@example.com", "password")
+        self.user = User.objects.create_user("owner@example.com", "password", first_name="Ann")
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.revoked_key = REVOKED_CACHE_KEY.format(self.user.id)
+
+    def test_profile_update_keeps_tokens(self):
+        response = self.client.put(reverse("user-detail", args=[self.user.id]), {"first_name": "Anna", "last_name": "Smith"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(cache.get(self.revoked_key))
+        user = User.objects.get(id=self.user.id)
+        user.save()
+        self.assertIsNone(cache.get(self.revoked_key))
+
+    def test_deactivation_revokes_tokens(self):
+        response = self.client.patch(reverse("user-detail", args=[self.user.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(cache.get(self.revoked_key))
+
+    def test_claim_change_revokes_tokens(self):
+        user = User.objects.only("id").get(id=self.user.id)
+        user.is_staff = True
+        user.save()
+        self.assertIsNotNone(cache.get(self.revoked_key))
+
+    @override_settings(STATELESS_AUTHENTICATION=False)
+    def test_no_revocation_without_stateless_authentication(self):
+        # every request loads the user, whose tokens survive claim changes
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIsNone(cache.get(self.revoked_key))
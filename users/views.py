@@ -1,4 +1,9 @@
+from functools import reduce
+from operator import or_
+
 from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -8,7 +13,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from api.permissions import IsStaff, IsSelfOrStaff
-from users.serializers import UserSerializer, UserCreateSerializer, UserUpdateSerializer, PasswordChangeSerializer
+from tasks.models import Task
+from users.pagination import UserCursorPagination
+from users.serializers import (
+    UserSerializer, UserCreateSerializer, UserRowSerializer, UserUpdateSerializer, PasswordChangeSerializer
+)
 
 User = get_user_model()
 
@@ -17,6 +26,8 @@ class UserList(APIView):
     Endpoints for both fetching all users and creating a new user.
     """
     allowed_methods = ['GET', 'POST']
+    pagination_class = UserCursorPagination
+    search_fields = ['email', 'first_name', 'last_name']
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -28,6 +39,27 @@ class UserList(APIView):
             return UserCreateSerializer
         return UserSerializer
 
+    def get_queryset(self, request):
+        active = request.query_params.get('active', None)
+        if active is not None:
+            active = active.lower() in ['true', '1', 'yes']
+            users = User.objects.filter(is_active=active)
+        else:
+            users = User.objects.all()
+
+        search = request.query_params.get('search', '').strip()
+        if search:
+            users = users.filter(reduce(or_, [Q(**{f"{field}__istartswith": search}) for field in self.search_fields]))
+        return users
+
+    def get_task_count(self):
+        """
+        Correlated count of each user's tasks. Unlike joining and grouping the tasks,
+        it is only evaluated for the users of the page.
+        """
+        tasks = Task.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(count=Count('id'))
+        return Coalesce(Subquery(tasks.values('count')), 0)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -36,21 +68,47 @@ class UserList(APIView):
                 required=False,
                 description="Filter users by their active status (true/false)"
             ),
+            OpenApiParameter(
+                name="search",
+                type=OpenApiTypes.STR,
+                required=False,
+                description="Case-insensitive prefix of the email, first name or last name"
+            ),
+            OpenApiParameter(
+                name="task_count",
+                type=OpenApiTypes.BOOL,
+                required=False,
+                description="Include the number of tasks of each user"
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                required=False,
+                description="Opaque cursor taken from the `next` link of the previous page"
+            ),
+            OpenApiParameter(
+                name="page_size",
+                type=OpenApiTypes.INT,
+                required=False,
+                description="Number of users per page (default 50, max 200)"
+            ),
         ]
     )
     def get(self, request):
         """
-        Get a list of users
+        Get a page of users, in sign-up order
         """
-        active = request.query_params.get('active', None)
-        if active is not None:
-            active = active.lower() in ['true', '1', 'yes']
-            users = User.objects.filter(is_active=active)
-        else:
-            users = User.objects.all()
-
-        serializer = self.get_serializer_class()(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        users = self.get_queryset(request)
+        with_task_count = str(request.query_params.get('task_count', '')).lower() in ['true', '1', 'yes']
+        serializer = UserRowSerializer(with_task_count)
+        fields = list(serializer.fields)
+        if with_task_count:
+            users = users.annotate(task_count=self.get_task_count())
+            fields.append('task_count')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(users.values(*fields), request, view=self)
+        return paginator.get_paginated_response(serializer.serialize(page))
 
     def post(self, request):
         """
@@ -153,7 +211,7 @@ class ChangePassword(APIView):
                 return Response({"detail": "Wrong password"}, status=status.HTTP_400_BAD_REQUEST)
 
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=["password"])
 
             return Response({"detail": "Password updated successfully"})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)